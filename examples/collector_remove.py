@@ -15,6 +15,10 @@ def main():
     parser.add_argument("-p", "--password",
                         help="LogicMonitor password",
                         required=True)
+    parser.add_argument("--cache",
+                        help="Reuse the collector, group and host lists " +
+                        "cached on disk by recent runs",
+                        action="store_true")
     args = parser.parse_args()
 
     params = {}
@@ -33,6 +37,7 @@ def main():
     params["company"] = args.company
     params["user"] = args.user
     params["password"] = args.password
+    params["cache"] = args.cache
 
     col = Collector(params)
 
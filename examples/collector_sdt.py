@@ -20,6 +20,10 @@ def main():
                         help="SDT duration")
     parser.add_argument("-s", "--starttime",
                         help="SDT start time")
+    parser.add_argument("--cache",
+                        help="Reuse the collector, group and host lists " +
+                        "cached on disk by recent runs",
+                        action="store_true")
     args = parser.parse_args()
 
     params = {}
@@ -38,6 +42,7 @@ def main():
     params["company"] = args.company
     params["user"] = args.user
     params["password"] = args.password
+    params["cache"] = args.cache
 
     # Optional params
     if args.duration is not None:
@@ -22,6 +22,10 @@ def main():
                         help="Device hostname")
     parser.add_argument("-d", "--displayname",
                         help="Device display name")
+    parser.add_argument("--cache",
+                        help="Reuse the collector, group and host lists " +
+                        "cached on disk by recent runs",
+                        action="store_true")
     args = parser.parse_args()
 
     params = {}
@@ -40,6 +44,7 @@ def main():
     params["company"] = args.company
     params["user"] = args.user
     params["password"] = args.password
+    params["cache"] = args.cache
     params["collector"] = args.collector
 
     # Optional params
@@ -0,0 +1,87 @@
+#!/usr/bin/python
+
+import argparse
+import sys
+from logicmonitor_core.HostRemover import HostRemover
+
+
+def read_targets(f):
+    """Read one device per line: either a display name or
+    'hostname,collector'. Blank lines and # comments are skipped."""
+    targets = []
+
+    for line in f:
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+
+        if "," in line:
+            hostname, collector = line.split(",", 1)
+            targets.append((hostname.strip(), collector.strip()))
+        else:
+            targets.append(line)
+
+    return targets
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-c", "--company",
+                        help="LogicMonitor account",
+                        required=True)
+    parser.add_argument("-u", "--user",
+                        help="LogicMonitor user name",
+                        required=True)
+    parser.add_argument("-p", "--password",
+                        help="LogicMonitor password",
+                        required=True)
+
+    parser.add_argument("-f", "--file",
+                        help="File listing the devices to remove. " +
+                        "Defaults to standard input",
+                        default="-")
+    parser.add_argument("-n", "--concurrency",
+                        help="Maximum number of devices removed at once",
+                        type=int,
+                        default=10)
+    parser.add_argument("--cache",
+                        help="Reuse the collector, group and host lists " +
+                        "cached on disk by recent runs",
+                        action="store_true")
+    args = parser.parse_args()
+
+    params = {}
+
+    # Required params
+    params["company"] = args.company
+    params["user"] = args.user
+    params["password"] = args.password
+    params["cache"] = args.cache
+
+    if args.file == "-":
+        targets = read_targets(sys.stdin)
+    else:
+        with open(args.file) as f:
+            targets = read_targets(f)
+
+    with HostRemover(max_concurrency=args.concurrency, **params) as remover:
+        results = remover.remove(targets)
+
+    exit_code = 0
+    for result in results:
+        if isinstance(result.item, tuple):
+            name = ",".join(result.item)
+        else:
+            name = result.item
+
+        if not result.ok:
+            print name + "\tfailed\t" + str(result.error)
+            exit_code = 1
+        elif result.result is None:
+            print name + "\tnot found"
+        else:
+            print name + "\tremoved"
+
+    return exit_code
+
+sys.exit(main())
@@ -33,6 +33,10 @@ def main():
                         nargs='+',)
     parser.add_argument("-a", "--alertenable",
                         help="Turn alerting on or off")
+    parser.add_argument("--cache",
+                        help="Reuse the collector, group and host lists " +
+                        "cached on disk by recent runs",
+                        action="store_true")
     args = parser.parse_args()
 
     params = {}
@@ -51,6 +55,7 @@ def main():
     params["company"] = args.company
     params["user"] = args.user
     params["password"] = args.password
+    params["cache"] = args.cache
     params["collector"] = args.collector
 
     # Optional params
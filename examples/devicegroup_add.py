@@ -27,6 +27,10 @@ def main():
                         type=json.loads)
     parser.add_argument("-a", "--alertenable",
                         help="Turn alerting on or off")
+    parser.add_argument("--cache",
+                        help="Reuse the collector, group and host lists " +
+                        "cached on disk by recent runs",
+                        action="store_true")
     args = parser.parse_args()
 
     params = {}
@@ -43,6 +47,7 @@ def main():
     params["company"] = args.company
     params["user"] = args.user
     params["password"] = args.password
+    params["cache"] = args.cache
     params["fullpath"] = args.fullpath
 
     # Optional params
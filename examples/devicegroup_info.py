@@ -18,6 +18,10 @@ def main():
     parser.add_argument("-f", "--fullpath",
                         help="Full path of the device group",
                         required=True)
+    parser.add_argument("--cache",
+                        help="Reuse the collector, group and host lists " +
+                        "cached on disk by recent runs",
+                        action="store_true")
     args = parser.parse_args()
 
     params = {}
@@ -35,6 +39,7 @@ def main():
     params["company"] = args.company
     params["user"] = args.user
     params["password"] = args.password
+    params["cache"] = args.cache
     params["fullpath"] = args.fullpath
 
     hg = Hostgroup(params)
@@ -20,6 +20,10 @@ def main():
     parser.add_argument("-g", "--group",
                         help="Limit the results to hosts in the group path " +
                         "specified. Example: /Servers")
+    parser.add_argument("--cache",
+                        help="Reuse the collector, group and host lists " +
+                        "cached on disk by recent runs",
+                        action="store_true")
     args = parser.parse_args()
 
     params = {}
@@ -29,6 +33,7 @@ def main():
     params["company"] = args.company
     params["user"] = args.user
     params["password"] = args.password
+    params["cache"] = args.cache
 
     # Optional params
     if args.group is not None:
@@ -0,0 +1,70 @@
+#!/usr/bin/python
+
+# RPC actions which only read account state. Anything starting with "get"
+# is a read; these are the exceptions to that naming rule.
+READ_ACTIONS = set([
+    "logicmonitorsetup",
+    "verifyProperties",
+])
+
+# Write actions which can safely be repeated. update* calls use
+# opType=replace and deleting something twice leaves it deleted.
+IDEMPOTENT_ACTIONS = set([
+    "deleteAgent",
+    "deleteHost",
+    "deleteHostGroup",
+    "updateHost",
+    "updateHostGroup",
+])
+
+# Read actions whose responses the session memoizes. The account-wide
+# listings (getAgents, getHostGroups, getHosts) are kept in the
+# session's indexes instead.
+MEMOIZED_ACTIONS = set([
+    "getAgent",
+    "getHost",
+    "getHostGroup",
+    "getHostGroupProperties",
+    "getHostProperties",
+    "getTimeZoneSetting",
+])
+
+# The memoized reads each write action can change. Writes which
+# aren't listed here discard every memoized response.
+INVALIDATES = {
+    "addAgent": set(["getAgent"]),
+    "updateAgent": set(["getAgent"]),
+    "deleteAgent": set(["getAgent", "getHost"]),
+    "addHost": set(["getHost", "getHostProperties"]),
+    "updateHost": set(["getHost", "getHostProperties"]),
+    "deleteHost": set(["getHost", "getHostProperties"]),
+    "addHostGroup": set(["getHostGroup", "getHostGroupProperties"]),
+    "updateHostGroup": set(["getHostGroup", "getHostGroupProperties",
+                            "getHostProperties"]),
+    "deleteHostGroup": set(["getHost", "getHostGroup",
+                            "getHostGroupProperties"]),
+    "setAgentSDT": set(["getAgent"]),
+    "setHostSDT": set(["getHost"]),
+    "setHostGroupSDT": set(["getHostGroup"]),
+    "setHostDataSourceSDT": set(),
+}
+
+
+def is_read(action):
+    """Returns true if the RPC action doesn't modify the account"""
+    return action.startswith("get") or action in READ_ACTIONS
+
+
+def is_idempotent(action):
+    """Returns true if repeating the RPC action
+    has the same effect as making it once"""
+    return is_read(action) or action in IDEMPOTENT_ACTIONS
+
+
+def invalidated_by(action):
+    """Returns the memoized read actions which the specified action can
+    change. None means any of them; an empty set means none."""
+    if is_read(action):
+        return set()
+
+    return INVALIDATES.get(action)
@@ -0,0 +1,217 @@
+#!/usr/bin/python
+
+import logging
+import sys
+import threading
+import Queue
+import Deadline
+import Errors
+from LogicMonitorSession import LogicMonitorSession
+
+DEFAULT_CONCURRENCY = 10
+
+
+class Future(object):
+    """The pending result of an operation submitted
+    to an AsyncLogicMonitor"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def done(self):
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        """Block until the operation completes and return its result,
+        re-raising any exception it raised"""
+        self._wait(timeout)
+
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+
+        return self._result
+
+    def exception(self, timeout=None):
+        """Block until the operation completes and return the
+        exception it raised, or None"""
+        self._wait(timeout)
+
+        if self._exc_info is not None:
+            return self._exc_info[1]
+
+        return None
+
+    def add_done_callback(self, fn):
+        """Call fn(future) once the operation completes. If it
+        already has, fn is called immediately."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(fn)
+                return
+
+        fn(self)
+
+    def _wait(self, timeout):
+        self._event.wait(timeout)
+
+        if not self._event.is_set():
+            raise RuntimeError("Timed out waiting for operation to complete")
+
+    def _set_result(self, result):
+        self._result = result
+        self._finish()
+
+    def _set_exc_info(self, exc_info):
+        self._exc_info = exc_info
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._event.set()
+            callbacks = self._callbacks
+            self._callbacks = []
+
+        for fn in callbacks:
+            try:
+                fn(self)
+            except Exception as e:
+                logging.debug("Future callback raised: " + str(e))
+
+
+def gather(futures, timeout=None):
+    """Wait for every future and return their
+    results in the same order"""
+    return [f.result(timeout) for f in futures]
+
+
+class AsyncLogicMonitor(object):
+    """Non-blocking LogicMonitor client. Calls are run on a pool of at
+    most max_concurrency worker threads and return a Future right away.
+
+    The requests themselves are built, sent and parsed by the same
+    LogicMonitorSession used by the blocking API."""
+
+    def __init__(self,
+                 session=None,
+                 max_concurrency=DEFAULT_CONCURRENCY,
+                 **params):
+        logging.debug("Instantiating AsyncLogicMonitor object")
+
+        if session is None:
+            session = LogicMonitorSession.shared(**params)
+        self.session = session
+        self.max_concurrency = max_concurrency
+
+        self._queue = Queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._depth = 0
+
+    def __enter__(self):
+        """Use the client in a with block to stop its worker threads
+        when the block ends. Blocks may be nested; the workers are
+        stopped when the outermost one ends."""
+        with self._lock:
+            self._depth = self._depth + 1
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        with self._lock:
+            self._depth = self._depth - 1
+            last = self._depth == 0
+
+        if last:
+            self.shutdown()
+
+        return False
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule fn(*args, **kwargs) on a worker thread and return
+        a Future for its result. Any deadline in effect for the caller
+        also applies to fn."""
+        future = Future()
+        self._start_workers()
+        self._queue.put((future, Deadline.current(), fn, args, kwargs))
+
+        return future
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads once queued work has finished. Any
+        later call starts them again."""
+        logging.debug("Running AsyncLogicMonitor.shutdown...")
+
+        with self._lock:
+            workers = self._workers
+            self._workers = []
+
+        for worker in workers:
+            self._queue.put(None)
+
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def rpc(self, action, params):
+        """Make a call to the LogicMonitor RPC library. Returns
+        a Future for the response"""
+        return self.submit(self.session.rpc, action, params)
+
+    def call(self, action, params):
+        """Make a call to the LogicMonitor RPC library. Returns
+        a Future for the decoded RPCResult"""
+        return self.submit(self.session.call, action, params)
+
+    def do(self, action, params):
+        """Make a call to the LogicMonitor server \"do\" function.
+        Returns a Future for the response"""
+        return self.submit(self.session.do, action, params)
+
+    def get_collectors(self):
+        return self.submit(self.session.get_collectors)
+
+    def get_host_by_hostname(self, hostname, collector):
+        return self.submit(self.session.get_host_by_hostname,
+                           hostname, collector)
+
+    def get_host_by_displayname(self, displayname):
+        return self.submit(self.session.get_host_by_displayname,
+                           displayname)
+
+    def get_collector_by_description(self, description):
+        return self.submit(self.session.get_collector_by_description,
+                           description)
+
+    def get_group(self, fullpath):
+        return self.submit(self.session.get_group, fullpath)
+
+    def _start_workers(self):
+        with self._lock:
+            while len(self._workers) < self.max_concurrency:
+                worker = threading.Thread(target=self._work)
+                worker.daemon = True
+                worker.start()
+                self._workers.append(worker)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+
+            if item is None:
+                return
+
+            future, deadline, fn, args, kwargs = item
+
+            try:
+                # fail() raises a typed LogicMonitorError on worker
+                # threads, so one bad item doesn't end a whole batch
+                with Deadline.activate(deadline), Errors.raise_errors():
+                    result = fn(*args, **kwargs)
+            except BaseException:
+                future._set_exc_info(sys.exc_info())
+            else:
+                future._set_result(result)
@@ -0,0 +1,110 @@
+#!/usr/bin/python
+
+import functools
+import logging
+import Deadline
+import Errors
+from AsyncLogicMonitor import AsyncLogicMonitor
+
+
+def batch(method):
+    """Decorator for the public methods of a BatchExecutor. The method
+    runs in library mode, so failures on the caller's thread (such as
+    loading the account snapshot) raise rather than exit. Once it
+    returns the executor's worker threads are stopped and anything the
+    session buffered during the batch is written out."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            with self, Errors.raise_errors():
+                return method(self, *args, **kwargs)
+        finally:
+            self.session.flush()
+
+    return wrapper
+
+
+class BatchResult(object):
+    """Outcome of one item in a batch. Exactly one of
+    result and error is set."""
+
+    def __init__(self, item, result=None, error=None):
+        self.item = item
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return "<BatchResult " + repr(self.item) + " ok>"
+        return ("<BatchResult " + repr(self.item) +
+                " error=" + repr(self.error) + ">")
+
+
+class BatchExecutor(AsyncLogicMonitor):
+    """Runs many RPC calls against one account with
+    at most max_concurrency of them in flight"""
+
+    @Deadline.bounded
+    @batch
+    def execute(self, calls):
+        """Run a list of (action, params) RPC calls concurrently.
+
+        Returns a BatchResult per call, in the same order as calls.
+        result holds the response data of a successful call. error holds
+        a LogicMonitorError for a call the server rejected, or the
+        exception raised while making it. A deadline (in seconds)
+        applies to the batch as a whole."""
+        logging.debug("Running BatchExecutor.execute...")
+
+        calls = list(calls)
+        futures = [self.call(action, params) for action, params in calls]
+
+        results = []
+        for call, future in zip(calls, futures):
+            results.append(self._rpc_result(call, future))
+
+        logging.debug("Batch of " + str(len(calls)) + " calls complete")
+        return results
+
+    @Deadline.bounded
+    @batch
+    def verify_properties(self, objects):
+        """Run verify_properties() on many Host or Hostgroup objects
+        concurrently. Returns a BatchResult per object, in the same
+        order, whose result is true if all of its supplied properties
+        match the account."""
+        logging.debug("Running BatchExecutor.verify_properties...")
+
+        objects = list(objects)
+        futures = [self.submit(o.verify_properties) for o in objects]
+
+        results = []
+        for obj, future in zip(objects, futures):
+            exc = future.exception()
+
+            if exc is not None:
+                logging.debug("Verifying properties raised " + repr(exc))
+                results.append(BatchResult(obj, error=exc))
+            else:
+                results.append(BatchResult(obj, result=future.result()))
+
+        return results
+
+    def _rpc_result(self, call, future):
+        exc = future.exception()
+
+        if exc is not None:
+            logging.debug("Call to " + call[0] + " raised " + repr(exc))
+            return BatchResult(call, error=exc)
+
+        resp = future.result()
+
+        if resp.ok:
+            return BatchResult(call, result=resp.data)
+
+        logging.debug("Call to " + call[0] + " failed: " + str(resp.errmsg))
+        return BatchResult(call, error=Errors.for_result(resp)(resp.errmsg))
@@ -1,6 +1,5 @@
 #!/usr/bin/python
 
-import json
 import logging
 import os
 import platform
@@ -8,20 +7,22 @@ import subprocess
 import sys
 from datetime import datetime, timedelta
 from subprocess import Popen
+import Deadline
+import Errors
 from LogicMonitor import LogicMonitor
 from Service import Service
 
 
 class Collector(LogicMonitor):
 
-    def __init__(self, params):
+    def __init__(self, params, session=None):
         """Initializor for the LogicMonitor Collector object"""
         logging.basicConfig(level=logging.DEBUG)
         logging.debug("Instantiating Collector object")
         self.change = False
         self.params = params
 
-        LogicMonitor.__init__(self, **params)
+        LogicMonitor.__init__(self, session, **params)
 
         if "description" in self.params:
             self.description = self.params['description']
@@ -48,6 +49,7 @@ class Collector(LogicMonitor):
         else:
             self.id = self.info["id"]
 
+    @Deadline.bounded
     def create(self):
         """Idempotent function to make sure that there is
         a running collector installed and registered"""
@@ -59,6 +61,7 @@ class Collector(LogicMonitor):
         self.start()
         logging.debug("Collector created")
 
+    @Deadline.bounded
     def remove(self):
         """Idempotent function to make sure that there is
         not a running collector installed and registered"""
@@ -69,8 +72,10 @@ class Collector(LogicMonitor):
         self.uninstall()
         logging.debug("Collector removed")
 
-    def get_installer_binary(self):
-        """Download the LogicMonitor collector installer binary"""
+    def get_installer_binary(self, progress=None):
+        """Download the LogicMonitor collector installer binary.
+        progress(bytes_done, bytes_total, bytes_per_second) is
+        called as the download proceeds."""
         logging.debug("Running Collector.get_installer_binary...")
 
         arch = 32
@@ -107,18 +112,20 @@ class Collector(LogicMonitor):
 
                 logging.debug("Downloading installer file")
                 try:
-                    f = open(installfilepath, "w")
-                    installer = (self.do("logicmonitorsetup",
-                                         {"id": self.id,
-                                          "arch": arch}))
-                    f.write(installer)
-                    f.closed
-                except:
-                    self.fail(msg="Unable to open installer file for writing")
-                    f.closed
+                    self.download("logicmonitorsetup",
+                                  {"id": self.id,
+                                   "arch": arch},
+                                  installfilepath,
+                                  progress)
+                except (IOError, OSError) as e:
+                    logging.debug(str(e))
+                    self.fail(msg="Unable to download the collector " +
+                                  "installer. " + str(e),
+                              error=Errors.TransportError)
             else:
                 logging.debug("Collector installer already exists")
-                return installfilepath
+
+            return installfilepath
 
         elif self.id is None:
             self.fail(
@@ -333,6 +340,7 @@ class Collector(LogicMonitor):
                 msg="Error: LogicMonitor Collector must be " +
                 "installed on a Linux device.")
 
+    @Deadline.bounded
     def sdt(self):
         """Create a scheduled down time
         (maintenance window) for this host"""
@@ -358,15 +366,18 @@ class Collector(LogicMonitor):
 
             # Use user UTC offset
             logging.debug("Making RPC call to 'getTimeZoneSetting'")
-            accountresp = json.loads(self.rpc("getTimeZoneSetting", {}))
+            accountresp = self.call("getTimeZoneSetting", {})
 
-            if accountresp["status"] == 200:
+            if accountresp.status == 200:
                 logging.debug("RPC call succeeded")
 
-                offset = accountresp["data"]["offset"]
+                offset = accountresp.data["offset"]
                 offsetstart = start + timedelta(0, offset)
             else:
-                self.fail(msg="Error: Unable to retrieve timezone offset")
+                self.fail(
+                    msg="Error: Unable to retrieve timezone " +
+                        "offset.\n%s" % accountresp.errmsg,
+                    error=Errors.for_result(accountresp))
 
         offsetend = offsetstart + timedelta(0, int(duration)*60)
 
@@ -385,14 +396,14 @@ class Collector(LogicMonitor):
              "endMinute": offsetend.minute}
 
         logging.debug("Making RPC call to 'setAgentSDT'")
-        resp = json.loads(self.rpc("setAgentSDT", h))
+        resp = self.call("setAgentSDT", h)
 
-        if resp["status"] == 200:
+        if resp.status == 200:
             logging.debug("RPC call succeeded")
-            return resp["data"]
+            return resp.data
         else:
             logging.debug("RPC call failed")
-            self.fail(msg=resp["errmsg"])
+            self.fail(msg=resp.errmsg, error=Errors.for_result(resp))
 
     def site_facts(self):
         """Output current properties information for the Collector"""
@@ -404,37 +415,33 @@ class Collector(LogicMonitor):
 
             self.output_info(props)
         else:
-            self.fail(msg="Error: Collector doesn't exit.")
+            self.fail(msg="Error: Collector doesn't exit.",
+                      error=Errors.NotFoundError)
 
     def _get(self):
         """Returns a JSON object representing this collector"""
         logging.debug("Running Collector._get...")
 
+        collectors = self.session.collector_index()
+
         ret = None
+        if self.description != "":
+            ret = collectors.get(self.description)
 
-        collector_list = self.get_collectors()
-
-        if collector_list is not None:
-            logging.debug("Collectors returned")
-            for collector in collector_list:
-                if (
-                    collector["description"] == self.description and
-                    collector["description"] != ""
-                ):
-                    logging.debug(
-                        "Collector matching description " +
-                        self.description + " found."
-                    )
-                    ret = collector
-                elif str(collector["id"]) == str(self.collector_id):
-                    logging.debug(
-                        "Collector id " + self.collector_id + " found."
-                    )
-                    ret = collector
+            if ret is not None:
+                logging.debug(
+                    "Collector matching description " +
+                    self.description + " found."
+                )
+
+        if ret is None and self.collector_id is not None:
+            ret = collectors.get_by_id(self.collector_id)
+
+            if ret is not None:
+                logging.debug(
+                    "Collector id " + str(self.collector_id) + " found."
+                )
 
-        else:
-            logging.debug("No collectors returned")
-            ret = None
         return ret
 
     def _create(self):
@@ -457,15 +464,16 @@ class Collector(LogicMonitor):
                      "description": self.description}
 
                 logging.debug("Making RPC call to 'addAgent'")
-                create = (json.loads(self.rpc("addAgent", h)))
+                create = self.call("addAgent", h)
 
-                if create["status"] is 200:
+                if create.status == 200:
                     logging.debug("RPC call succeeded")
-                    self.info = create["data"]
-                    self.id = create["data"]["id"]
-                    return create["data"]
+                    self.info = create.data
+                    self.id = create.data["id"]
+                    return create.data
                 else:
-                    self.fail(msg=create["errmsg"])
+                    self.fail(msg=create.errmsg,
+                              error=Errors.for_result(create))
             else:
                 self.info = ret
                 self.id = ret["id"]
@@ -493,20 +501,19 @@ class Collector(LogicMonitor):
                 self.exit(changed=True)
 
             logging.debug("Making RPC call to 'deleteAgent'")
-            delete = json.loads(self.rpc("deleteAgent",
-                                         {"id": self.id}))
+            delete = self.call("deleteAgent", {"id": self.id})
 
-            if delete["status"] is 200:
+            if delete.status == 200:
                 logging.debug("RPC call succeeded")
-                return delete
+                return delete.body
             else:
                 # The collector couldn't unregister. Start the service again
                 logging.debug("Error unregistering collecting. " +
-                              delete["errmsg"])
+                              delete.errmsg)
                 logging.debug("The collector service will be restarted")
 
                 self.start()
-                self.fail(msg=delete["errmsg"])
+                self.fail(msg=delete.errmsg, error=Errors.for_result(delete))
         else:
             logging.debug("Collector not found")
             return None
@@ -0,0 +1,113 @@
+#!/usr/bin/python
+
+import logging
+import threading
+import time
+
+
+class CollectorIndex(object):
+    """Index of the collectors in an account, keyed by
+    description and by id, with lookup hit/miss counts"""
+
+    def __init__(self, collectors=None):
+        logging.debug("Instantiating CollectorIndex object")
+
+        self.collectors = []
+        self.by_id = {}
+        self.by_description = {}
+        self.loaded_at = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+
+        if collectors is not None:
+            self.load(collectors)
+
+    def load(self, collectors, loaded_at=None):
+        """Replace the index with a getAgents snapshot taken
+        at loaded_at (seconds since the epoch, now by default)"""
+        logging.debug("Loading " + str(len(collectors)) +
+                      " collectors into index")
+
+        with self._lock:
+            self.collectors = []
+            self.by_id = {}
+            self.by_description = {}
+
+            for collector in collectors:
+                self._index(collector)
+
+            if loaded_at is None:
+                loaded_at = time.time()
+            self.loaded_at = loaded_at
+
+    def is_stale(self, ttl):
+        """Returns true if the index was never loaded or
+        was loaded more than ttl seconds ago"""
+        with self._lock:
+            return (self.loaded_at is None or
+                    time.time() - self.loaded_at > ttl)
+
+    def invalidate(self):
+        with self._lock:
+            self.loaded_at = None
+
+    def record(self, hit):
+        """Count a lookup as answered from the index (hit)
+        or as needing a getAgents call (miss)"""
+        with self._lock:
+            if hit:
+                self.hits = self.hits + 1
+            else:
+                self.misses = self.misses + 1
+
+    def all(self):
+        """Returns a list of every collector"""
+        with self._lock:
+            return list(self.collectors)
+
+    def get(self, description):
+        """Returns the collector with the specified description, or None"""
+        with self._lock:
+            return self.by_description.get(description)
+
+    def get_by_id(self, collector_id):
+        """Returns the collector with the specified id, or None"""
+        with self._lock:
+            return self.by_id.get(str(collector_id))
+
+    def add(self, collector):
+        """Add or replace a single collector, such as
+        one returned by addAgent"""
+        with self._lock:
+            self.remove(collector["id"])
+            self._index(collector)
+
+    def remove(self, collector_id):
+        with self._lock:
+            collector = self.by_id.pop(str(collector_id), None)
+            if collector is None:
+                return
+
+            self.collectors.remove(collector)
+            if self.by_description.get(collector["description"]) is collector:
+                del self.by_description[collector["description"]]
+
+    def metrics(self):
+        with self._lock:
+            return {"size": len(self.collectors),
+                    "hits": self.hits,
+                    "misses": self.misses}
+
+    def __len__(self):
+        return len(self.collectors)
+
+    def _index(self, collector):
+        self.collectors.append(collector)
+        self.by_id[str(collector["id"])] = collector
+
+        # Descriptions aren't unique. Like the linear scan this
+        # replaces, the first collector with a description wins.
+        if collector["description"] != "":
+            self.by_description.setdefault(collector["description"],
+                                           collector)
@@ -1,26 +1,28 @@
 #!/usr/bin/python
 
-import json
 import logging
 from datetime import datetime, timedelta
+import Deadline
+import Errors
 from LogicMonitor import LogicMonitor
 
 
 class Datasource(LogicMonitor):
 
-    def __init__(self, params):
+    def __init__(self, params, session=None):
         """Initializor for the LogicMonitor Datasource object"""
         logging.basicConfig(level=logging.DEBUG)
         logging.debug("Instantiating Datasource object")
         self.change = False
         self.params = params
 
-        LogicMonitor.__init__(self, **params)
+        LogicMonitor.__init__(self, session, **params)
 
         self.id = self.params["id"]
         self.starttime = self.params["starttime"]
         self.duration = self.params["duration"]
 
+    @Deadline.bounded
     def sdt(self):
         """Create a scheduled down time
         (maintenance window) for this host"""
@@ -46,15 +48,18 @@ class Datasource(LogicMonitor):
 
             # Use user UTC offset
             logging.debug("Making RPC call to 'getTimeZoneSetting'")
-            accountresp = json.loads(self.rpc("getTimeZoneSetting", {}))
+            accountresp = self.call("getTimeZoneSetting", {})
 
-            if accountresp["status"] == 200:
+            if accountresp.status == 200:
                 logging.debug("RPC call succeeded")
 
-                offset = accountresp["data"]["offset"]
+                offset = accountresp.data["offset"]
                 offsetstart = start + timedelta(0, offset)
             else:
-                self.fail(msg="Error: Unable to retrieve timezone offset")
+                self.fail(
+                    msg="Error: Unable to retrieve timezone " +
+                        "offset.\n%s" % accountresp.errmsg,
+                    error=Errors.for_result(accountresp))
 
         offsetend = offsetstart + timedelta(0, int(duration)*60)
 
@@ -73,11 +78,11 @@ class Datasource(LogicMonitor):
              "endMinute": offsetend.minute}
 
         logging.debug("Making RPC call to 'setHostDataSourceSDT'")
-        resp = json.loads(self.rpc("setHostDataSourceSDT", h))
+        resp = self.call("setHostDataSourceSDT", h)
 
-        if resp["status"] == 200:
+        if resp.status == 200:
             logging.debug("RPC call succeeded")
-            return resp["data"]
+            return resp.data
         else:
             logging.debug("RPC call failed")
-            self.fail(msg=resp["errmsg"])
+            self.fail(msg=resp.errmsg, error=Errors.for_result(resp))
@@ -0,0 +1,85 @@
+#!/usr/bin/python
+
+import contextlib
+import functools
+import threading
+import time
+
+_local = threading.local()
+
+
+class DeadlineExceeded(IOError):
+    """Raised when an operation runs out of time"""
+    pass
+
+
+class Deadline(object):
+
+    def __init__(self, expires):
+        """Initializor for a deadline expiring at the
+        specified time (in seconds since the epoch)"""
+        self.expires = expires
+
+    @classmethod
+    def after(cls, seconds):
+        return cls(time.time() + seconds)
+
+    def remaining(self):
+        return self.expires - time.time()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+def current():
+    """Returns the deadline in effect on this thread, or None"""
+    return getattr(_local, "deadline", None)
+
+
+def remaining():
+    """Returns the seconds left before the deadline in
+    effect on this thread, or None if there is no deadline"""
+    deadline = current()
+
+    if deadline is None:
+        return None
+
+    return deadline.remaining()
+
+
+@contextlib.contextmanager
+def activate(deadline):
+    """Make deadline (a Deadline or None) apply to everything run on this
+    thread inside the with block. An enclosing deadline which expires
+    sooner still wins."""
+    previous = current()
+
+    if deadline is not None and (previous is None or
+                                 deadline.expires < previous.expires):
+        _local.deadline = deadline
+
+    try:
+        yield current()
+    finally:
+        _local.deadline = previous
+
+
+def scope(seconds):
+    """Give everything run on this thread inside the with
+    block at most seconds to complete. None means no limit."""
+    if seconds is None:
+        return activate(None)
+
+    return activate(Deadline.after(seconds))
+
+
+def bounded(method):
+    """Decorator which adds a deadline keyword argument (in seconds) to a
+    method. Every RPC made by the method, including those made by nested
+    calls, has to complete within that one budget."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with scope(kwargs.pop("deadline", None)):
+            return method(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,77 @@
+#!/usr/bin/python
+
+import contextlib
+import threading
+
+_local = threading.local()
+
+
+class LogicMonitorError(Exception):
+    """Raised by fail() in library mode instead of exiting"""
+    pass
+
+
+class AuthError(LogicMonitorError):
+    """The account rejected the credentials"""
+    pass
+
+
+class NotFoundError(LogicMonitorError):
+    """A host, group or collector doesn't exist"""
+    pass
+
+
+class ConflictError(LogicMonitorError):
+    """The object being created already exists"""
+    pass
+
+
+class TransportError(LogicMonitorError):
+    """The portal couldn't be reached, or the connection failed"""
+    pass
+
+
+class ServerError(LogicMonitorError):
+    """The portal refused or failed to carry out a call"""
+    pass
+
+
+class CheckModeExit(Exception):
+    """Raised by exit() in library mode instead of exiting. changed
+    says whether the operation would have changed the account."""
+
+    def __init__(self, changed):
+        Exception.__init__(self, "Changed: " + str(changed))
+        self.changed = changed
+
+
+def for_result(resp):
+    """Returns the exception class matching a failed RPCResult"""
+    errmsg = resp.errmsg or ""
+
+    if resp.status == 403:
+        return AuthError
+    if resp.status == 404 or errmsg.startswith("No such"):
+        return NotFoundError
+    if "already exists" in errmsg:
+        return ConflictError
+    return ServerError
+
+
+def raising():
+    """Returns true if fail() raises rather than
+    exits on this thread"""
+    return getattr(_local, "raising", False)
+
+
+@contextlib.contextmanager
+def raise_errors():
+    """Make fail() and exit() raise exceptions instead of exiting for
+    everything run on this thread inside the with block"""
+    previous = raising()
+    _local.raising = True
+
+    try:
+        yield
+    finally:
+        _local.raising = previous
@@ -0,0 +1,164 @@
+#!/usr/bin/python
+
+import logging
+import threading
+import time
+
+
+def normalize(fullpath):
+    """Returns a group path in the form used by the
+    fullPath field, without a leading slash"""
+    return fullpath.lstrip('/')
+
+
+class GroupNode(object):
+    """A device group and its place in the group tree"""
+
+    def __init__(self, group):
+        self.group = group
+        self.id = str(group["id"])
+        self.fullpath = normalize(group.get("fullPath") or "")
+        self.parent = None
+        self.children = []
+
+
+class GroupTree(object):
+    """Index of every device group in an account, keyed by id (as a
+    string, so either form of an id finds the group) and by full path,
+    with parent/child links between groups"""
+
+    def __init__(self, groups=None):
+        logging.debug("Instantiating GroupTree object")
+
+        self.by_id = {}
+        self.by_path = {}
+        self.loaded_at = None
+        self._lock = threading.RLock()
+
+        if groups is not None:
+            self.load(groups)
+
+    def load(self, groups, loaded_at=None):
+        """Replace the tree with a getHostGroups snapshot taken
+        at loaded_at (seconds since the epoch, now by default)"""
+        logging.debug("Loading " + str(len(groups)) + " groups into tree")
+
+        with self._lock:
+            self.by_id = {}
+            self.by_path = {}
+
+            for group in groups:
+                node = GroupNode(group)
+                self.by_id[node.id] = node
+                self.by_path[node.fullpath] = node
+
+            for node in self.by_id.values():
+                self._link(node)
+
+            if loaded_at is None:
+                loaded_at = time.time()
+            self.loaded_at = loaded_at
+
+    def is_stale(self, ttl):
+        """Returns true if the tree was never loaded or
+        was loaded more than ttl seconds ago"""
+        with self._lock:
+            return (self.loaded_at is None or
+                    time.time() - self.loaded_at > ttl)
+
+    def invalidate(self):
+        with self._lock:
+            self.loaded_at = None
+
+    def get(self, fullpath):
+        """Returns the group with the specified path, or None"""
+        with self._lock:
+            node = self.by_path.get(normalize(fullpath))
+
+        if node is None:
+            return None
+        return node.group
+
+    def get_by_id(self, group_id):
+        """Returns the group with the specified id, or None"""
+        with self._lock:
+            node = self.by_id.get(str(group_id))
+
+        if node is None:
+            return None
+        return node.group
+
+    def subtree(self, fullpath):
+        """Returns the group at fullpath and every group below it"""
+        with self._lock:
+            node = self.by_path.get(normalize(fullpath))
+            if node is None:
+                return []
+
+            groups = []
+            pending = [node]
+
+            while pending:
+                node = pending.pop()
+                groups.append(node.group)
+                pending.extend(node.children)
+
+            return groups
+
+    def add(self, group):
+        """Add a single group, such as one returned by addHostGroup"""
+        with self._lock:
+            if group.get("fullPath") is None:
+                parent = self.by_id.get(str(group.get("parentId")))
+
+                if parent is None:
+                    # Not enough information to place the group
+                    self.invalidate()
+                    return
+
+                group = dict(group)
+                group["fullPath"] = (parent.fullpath + "/" +
+                                     group["name"]).lstrip("/")
+
+            node = GroupNode(group)
+            existing = self.by_id.get(node.id)
+
+            if existing is not None:
+                if existing.fullpath == node.fullpath:
+                    existing.group = group
+                else:
+                    # The group moved, taking its subtree with it
+                    self.invalidate()
+                return
+
+            self.by_id[node.id] = node
+            self.by_path[node.fullpath] = node
+            self._link(node)
+
+    def remove(self, group_id):
+        """Remove a group and everything below it"""
+        with self._lock:
+            node = self.by_id.get(str(group_id))
+            if node is None:
+                return
+
+            if node.parent is not None:
+                node.parent.children.remove(node)
+
+            pending = [node]
+            while pending:
+                node = pending.pop()
+                self.by_id.pop(node.id, None)
+                if self.by_path.get(node.fullpath) is node:
+                    del self.by_path[node.fullpath]
+                pending.extend(node.children)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def _link(self, node):
+        parent = self.by_id.get(str(node.group.get("parentId")))
+
+        if parent is not None and parent is not node:
+            node.parent = parent
+            parent.children.append(node)
@@ -0,0 +1,112 @@
+#!/usr/bin/python
+
+import logging
+import Deadline
+import Errors
+import GroupTree
+from BatchExecutor import BatchExecutor, batch
+
+ALREADY_EXISTS = "The record already exists"
+
+
+class GroupTreeBuilder(BatchExecutor):
+    """Creates many device groups at once. The desired paths are compared
+    with one snapshot of the group tree and the missing groups are
+    created a level at a time, siblings concurrently."""
+
+    @Deadline.bounded
+    @batch
+    def create(self, paths, description="", alertenable=True):
+        """Make sure every group path in paths (and each of their parents)
+        exists. New groups get the specified description and alerting
+        setting. A group which turns out to exist already, for instance
+        because another process just created it, counts as created.
+
+        Returns a dictionary of '/'-prefixed full path to group id for
+        every path and parent. Paths which couldn't be created map to
+        None. A deadline (in seconds) applies to the whole tree."""
+        logging.debug("Running GroupTreeBuilder.create...")
+
+        wanted = set()
+        for path in paths:
+            path = GroupTree.normalize(path)
+            while path:
+                wanted.add(path)
+                path = path.rpartition("/")[0]
+
+        try:
+            tree = self.session.group_tree()
+        except Errors.LogicMonitorError as e:
+            logging.debug("Unable to load groups: " + str(e))
+            return dict(("/" + path, None) for path in wanted)
+
+        ids = {"": 1}
+        levels = {}
+        for path in wanted:
+            group = tree.get(path)
+
+            if group is not None:
+                ids[path] = group["id"]
+            else:
+                levels.setdefault(path.count("/"), []).append(path)
+
+        logging.debug(str(len(wanted) - len(ids) + 1) + " of " +
+                      str(len(wanted)) + " groups to create")
+
+        for depth in sorted(levels):
+            self._create_level(levels[depth], ids, description, alertenable)
+
+        return dict(("/" + path, ids.get(path)) for path in wanted)
+
+    def _create_level(self, paths, ids, description, alertenable):
+        """Create sibling groups (all at one depth) concurrently,
+        adding the id of each one created to ids"""
+        calls = []
+        for path in paths:
+            parentpath, name = path.rpartition("/")[::2]
+            parentid = ids.get(parentpath)
+
+            if parentid is None:
+                logging.debug("Skipping " + path + ". Parent wasn't created")
+                ids[path] = None
+                continue
+
+            h = {"name": name,
+                 "parentId": parentid,
+                 "alertEnable": alertenable,
+                 "description": description}
+            calls.append((path, self.call("addHostGroup", h)))
+
+        conflicts = []
+        for path, future in calls:
+            exc = future.exception()
+
+            if exc is not None:
+                logging.debug("Creating " + path + " raised " + repr(exc))
+                ids[path] = None
+                continue
+
+            resp = future.result()
+            if resp.ok:
+                ids[path] = resp.data["id"]
+            elif resp.errmsg == ALREADY_EXISTS:
+                logging.debug("The hostgroup " + path + " already exists")
+                conflicts.append(path)
+            else:
+                logging.debug("Unable to create " + path + ": " +
+                              str(resp.errmsg))
+                ids[path] = None
+
+        if conflicts:
+            # Pick up the groups somebody else created in one reload
+            try:
+                tree = self.session.group_tree(refresh=True)
+            except Errors.LogicMonitorError as e:
+                logging.debug("Unable to reload groups: " + str(e))
+                for path in conflicts:
+                    ids[path] = None
+                return
+
+            for path in conflicts:
+                group = tree.get(path)
+                ids[path] = group and group["id"]
@@ -1,22 +1,25 @@
 #!/usr/bin/python
 
-import json
 import logging
 from datetime import datetime, timedelta
+import Deadline
+import Errors
 from LogicMonitor import LogicMonitor
 
 
 class Host(LogicMonitor):
 
-    def __init__(self, params):
+    # Properties set by LogicMonitor itself, left out of comparisons
+    IGNORED_PROPERTIES = ['system.categories', 'snmp.version']
+
+    def __init__(self, params, session=None):
         """Initializor for the LogicMonitor host object"""
         logging.basicConfig(level=logging.DEBUG)
         logging.debug("Instantiating Host object")
         self.change = False
         self.params = params
-        self.collector = None
 
-        LogicMonitor.__init__(self, **self.params)
+        LogicMonitor.__init__(self, session, **self.params)
 
         if self.params["hostname"]:
             logging.debug("Hostname is " + self.params["hostname"])
@@ -32,6 +35,85 @@ class Host(LogicMonitor):
             logging.debug("No display name specified. Using " + self.fqdn)
             self.displayname = self.fqdn
 
+        # The host and collector records are looked up on first use
+        # (or by prefetch()) rather than here
+        self._info = None
+        self._collector = None
+        self._resolved = False
+
+        self.properties = self.params["properties"]
+        self.description = self.params["description"]
+        self.starttime = self.params["starttime"]
+        self.duration = self.params["duration"]
+        self.alertenable = self.params["alertenable"]
+        if self.params["groups"] is not None:
+            self.groups = self._strip_groups(self.params["groups"])
+        else:
+            self.groups = None
+
+    @property
+    def info(self):
+        """The LogicMonitor record for this host, or None"""
+        if not self._resolved:
+            self._resolve()
+        return self._info
+
+    @info.setter
+    def info(self, value):
+        if not self._resolved:
+            self._resolve()
+        self._info = value
+
+    @property
+    def collector(self):
+        """The LogicMonitor record for this host's collector, or None"""
+        if not self._resolved:
+            self._resolve()
+        return self._collector
+
+    @collector.setter
+    def collector(self, value):
+        if not self._resolved:
+            self._resolve()
+        self._collector = value
+
+    def prefetch(self):
+        """Look up the host and collector records now rather
+        than on first use"""
+        logging.debug("Running Host.prefetch...")
+
+        if not self._resolved:
+            self._resolve()
+
+    @classmethod
+    def prefetch_all(cls, hosts):
+        """Look up the records of many hosts. The collector, host and (if
+        any host has groups) group lists of each account are fetched once
+        and every host is then resolved from them in memory."""
+        logging.debug("Running Host.prefetch_all...")
+
+        hosts = list(hosts)
+        sessions = {}
+        for host in hosts:
+            sessions.setdefault(id(host.session), []).append(host)
+
+        for group in sessions.values():
+            session = group[0].session
+            session.collector_index()
+            session.host_index()
+
+            if [h for h in group if h.groups is not None]:
+                session.group_tree()
+
+        for host in hosts:
+            host.prefetch()
+
+        return hosts
+
+    def _resolve(self):
+        """Find this host and its collector in the account"""
+        self._resolved = True
+
         # Attempt to host information via display name of host name
         logging.debug("Attempting to find host by displayname " +
                       self.displayname)
@@ -41,7 +123,7 @@ class Host(LogicMonitor):
             logging.debug("Host found by displayname")
             # Used the host information to grab the collector description
             # if not provided
-            if (not hasattr(self.params, "collector") and
+            if (not self.params.get("collector") and
                "agentDescription" in info):
                 logging.debug("Setting collector from host response. " +
                               "Collector " + info["agentDescription"])
@@ -54,8 +136,8 @@ class Host(LogicMonitor):
         if self.params["collector"]:
             logging.debug("Collector specified is " +
                           self.params["collector"])
-            self.collector = (self.get_collector_by_description(
-                              self.params["collector"]))
+            self._collector = (self.get_collector_by_description(
+                               self.params["collector"]))
         else:
             self.fail(msg="No collector specified.")
 
@@ -63,19 +145,11 @@ class Host(LogicMonitor):
         if info is None:
             logging.debug("Attempting to find host by hostname " +
                           self.hostname)
-            info = self.get_host_by_hostname(self.hostname, self.collector)
+            info = self.get_host_by_hostname(self.hostname, self._collector)
 
-        self.info = info
-        self.properties = self.params["properties"]
-        self.description = self.params["description"]
-        self.starttime = self.params["starttime"]
-        self.duration = self.params["duration"]
-        self.alertenable = self.params["alertenable"]
-        if self.params["groups"] is not None:
-            self.groups = self._strip_groups(self.params["groups"])
-        else:
-            self.groups = None
+        self._info = info
 
+    @Deadline.bounded
     def create(self):
         """Idemopotent function to create if missing,
         update if changed, or skip"""
@@ -90,19 +164,22 @@ class Host(LogicMonitor):
 
         if self.info:
             logging.debug("Making RPC call to 'getHostProperties'")
-            properties_json = (json.loads(self.rpc("getHostProperties",
-                                          {'hostId': self.info["id"],
-                                           "filterSystemProperties": True})))
+            properties_json = self.call("getHostProperties",
+                                        {'hostId': self.info["id"],
+                                         "filterSystemProperties": True})
 
-            if properties_json["status"] == 200:
+            if properties_json.status == 200:
                 logging.debug("RPC call succeeded")
-                return properties_json["data"]
+                return properties_json.data
             else:
                 logging.debug("Error: there was an issue retrieving the " +
                               "host properties")
-                logging.debug(properties_json["errmsg"])
+                logging.debug(properties_json.errmsg)
 
-                self.fail(msg=properties_json["status"])
+                self.fail(
+                    msg="Error: Unable to retrieve host " +
+                        "properties.\n%s" % properties_json.errmsg,
+                    error=Errors.for_result(properties_json))
         else:
             logging.debug("Unable to find LogicMonitor host which " +
                           "matches " + self.displayname +
@@ -122,6 +199,7 @@ class Host(LogicMonitor):
         logging.debug("Assigning property hash to host object")
         self.properties = propertyhash
 
+    @Deadline.bounded
     def add(self):
         """Add this device to monitoring
         in your LogicMonitor account"""
@@ -145,20 +223,22 @@ class Host(LogicMonitor):
                 self.alertenable)
 
             logging.debug("Making RPC call to 'addHost'")
-            resp = json.loads(self.rpc("addHost", h))
+            resp = self.call("addHost", h)
 
-            if resp["status"] == 200:
+            if resp.status == 200:
                 logging.debug("RPC call succeeded")
-                return resp["data"]
+                return resp.data
             else:
                 logging.debug("RPC call failed")
                 logging.debug(resp)
-                return resp["errmsg"]
+                return resp.errmsg
         elif self.collector is None:
-            self.fail(msg="Specified collector doesn't exist")
+            self.fail(msg="Specified collector doesn't exist",
+                      error=Errors.NotFoundError)
         else:
             logging.debug("Host already registered")
 
+    @Deadline.bounded
     def update(self):
         """This method takes changes made to this host
         and applies them to the corresponding host
@@ -186,13 +266,16 @@ class Host(LogicMonitor):
                 h["opType"] = "replace"
 
                 logging.debug("Making RPC call to 'updateHost'")
-                resp = json.loads(self.rpc("updateHost", h))
+                resp = self.call("updateHost", h)
 
-                if resp["status"] == 200:
+                if resp.status == 200:
                     logging.debug("RPC call succeeded")
                 else:
                     logging.debug("RPC call failed")
-                    self.fail(msg="Error: unable to update the host.")
+                    self.fail(
+                        msg="Error: unable to update the " +
+                            "host.\n%s" % resp.errmsg,
+                        error=Errors.for_result(resp))
             else:
                 logging.debug("Host properties match supplied properties. " +
                               "No changes to make.")
@@ -207,6 +290,7 @@ class Host(LogicMonitor):
 
             return self.add()
 
+    @Deadline.bounded
     def remove(self):
         """Remove this host from your LogicMonitor account"""
         logging.debug("Running Host.remove...")
@@ -220,19 +304,19 @@ class Host(LogicMonitor):
                 self.exit(changed=True)
 
             logging.debug("Making RPC call to 'deleteHost'")
-            resp = json.loads(self.rpc("deleteHost",
-                                       {"hostId": self.info["id"],
-                                        "deleteFromSystem": True,
-                                        "hostGroupId": 1}))
+            resp = self.call("deleteHost",
+                             {"hostId": self.info["id"],
+                              "deleteFromSystem": True,
+                              "hostGroupId": 1})
 
-            if resp["status"] == 200:
+            if resp.status == 200:
                 logging.debug(resp)
                 logging.debug("RPC call succeeded")
-                return resp
+                return resp.body
             else:
                 logging.debug("RPC call failed")
                 logging.debug(resp)
-                self.fail(msg=resp["errmsg"])
+                self.fail(msg=resp.errmsg, error=Errors.for_result(resp))
 
         else:
             logging.debug("Host not registered")
@@ -242,7 +326,7 @@ class Host(LogicMonitor):
         match the LogicMonitor account"""
         logging.debug("Running Host.is_changed")
 
-        ignore = ['system.categories', 'snmp.version']
+        ignore = self.IGNORED_PROPERTIES
 
         hostresp = self.get_host_by_displayname(self.displayname)
 
@@ -283,6 +367,15 @@ class Host(LogicMonitor):
         else:
             self.fail(msg="Error: Unknown error retrieving host information")
 
+    def verify_properties(self, propnames=None):
+        """Check with LogicMonitor server that the supplied values of
+        propnames (by default every supplied property) are the ones set
+        on the host. All of them are verified with a single
+        verifyProperties call. Returns true if they all match."""
+        logging.debug("Running Host.verify_properties...")
+        return self._verify_properties("hostId", "Host", propnames)
+
+    @Deadline.bounded
     def sdt(self):
         """Create a scheduled down time
         (maintenance window) for this host"""
@@ -309,16 +402,18 @@ class Host(LogicMonitor):
 
                 # Use user UTC offset
                 logging.debug("Making RPC call to 'getTimeZoneSetting'")
-                accountresp = (json.loads(self.rpc("getTimeZoneSetting", {})))
+                accountresp = self.call("getTimeZoneSetting", {})
 
-                if accountresp["status"] == 200:
+                if accountresp.status == 200:
                     logging.debug("RPC call succeeded")
 
-                    offset = accountresp["data"]["offset"]
+                    offset = accountresp.data["offset"]
                     offsetstart = start + timedelta(0, offset)
                 else:
                     self.fail(
-                        msg="Error: Unable to retrieve timezone offset")
+                        msg="Error: Unable to retrieve timezone " +
+                            "offset.\n%s" % accountresp.errmsg,
+                        error=Errors.for_result(accountresp))
 
             offsetend = offsetstart + timedelta(0, int(duration)*60)
 
@@ -336,16 +431,37 @@ class Host(LogicMonitor):
                  "endMinute": offsetend.minute}
 
             logging.debug("Making RPC call to 'setHostSDT'")
-            resp = (json.loads(self.rpc("setHostSDT", h)))
+            resp = self.call("setHostSDT", h)
 
-            if resp["status"] == 200:
+            if resp.status == 200:
                 logging.debug("RPC call succeeded")
-                return resp["data"]
+                return resp.data
             else:
                 logging.debug("RPC call failed")
-                self.fail(msg=resp["errmsg"])
+                self.fail(msg=resp.errmsg, error=Errors.for_result(resp))
         else:
-            self.fail(msg="Error: Host doesn't exit.")
+            self.fail(msg="Error: Host doesn't exit.",
+                      error=Errors.NotFoundError)
+
+    def add_async(self, client):
+        """Non-blocking form of Host.add. Runs on the specified
+        AsyncLogicMonitor and returns a Future"""
+        return client.submit(self.add)
+
+    def update_async(self, client):
+        """Non-blocking form of Host.update. Runs on the specified
+        AsyncLogicMonitor and returns a Future"""
+        return client.submit(self.update)
+
+    def remove_async(self, client):
+        """Non-blocking form of Host.remove. Runs on the specified
+        AsyncLogicMonitor and returns a Future"""
+        return client.submit(self.remove)
+
+    def sdt_async(self, client):
+        """Non-blocking form of Host.sdt. Runs on the specified
+        AsyncLogicMonitor and returns a Future"""
+        return client.submit(self.sdt)
 
     def site_facts(self):
         """Output current properties information for the Host"""
@@ -357,7 +473,8 @@ class Host(LogicMonitor):
 
             self.output_info(props)
         else:
-            self.fail(msg="Error: Host doesn't exit.")
+            self.fail(msg="Error: Host doesn't exit.",
+                      error=Errors.NotFoundError)
 
     def _build_host_hash(self,
                          hostname,
@@ -405,88 +522,74 @@ class Host(LogicMonitor):
 
         return h
 
-    def _verify_property(self, propname):
-        """Check with LogicMonitor server to
-        verify property is unchanged"""
-        logging.debug("Running Host._verify_property...")
-
-        if self.info:
-            logging.debug("Host is registered")
-            if propname not in self.properties:
-                logging.debug("Property " + propname + " does not exist")
-                return False
-            else:
-                logging.debug("Property " + propname + " exists")
-                h = {"hostId": self.info["id"],
-                     "propName0": propname,
-                     "propValue0": self.properties[propname]}
-
-                logging.debug("Making RCP call to 'verifyProperties'")
-                resp = json.loads(self.rpc('verifyProperties', h))
-
-                if resp["status"] == 200:
-                    logging.debug("RPC call succeeded")
-                    return resp["data"]["match"]
-                else:
-                    self.fail(
-                        msg="Error: unable to get verification " +
-                            "from server.\n%s" % resp["errmsg"])
-        else:
-            self.fail(
-                msg="Error: Host doesn't exist. Unable to verify properties")
-
     def _compare_groups(self, hostresp):
         """Function to compare the host's current
         groups against provided groups"""
         logging.debug("Running Host._compare_groups")
 
-        g = []
-        fullpathinids = hostresp["fullPathInIds"]
-        logging.debug("Building list of groups")
-        for path in fullpathinids:
-            if path != []:
-                h = {'hostGroupId': path[-1]}
+        if self.groups is None:
+            return None
 
-                hgresp = json.loads(self.rpc("getHostGroup", h))
+        groupids = [path[-1] for path in hostresp["fullPathInIds"]
+                    if path != []]
 
-                if (hgresp["status"] == 200 and
-                   hgresp["data"]["appliesTo"] == ""):
+        tree = self.session.group_tree()
+        if [i for i in groupids if tree.get_by_id(i) is None]:
+            logging.debug("Host is in groups missing from the group tree")
+            tree = self.session.group_tree(refresh=True)
 
-                    g.append(path[-1])
+        # Dynamic groups (those with an appliesTo expression) aren't
+        # managed through the host's group list, so leave them out
+        logging.debug("Building list of groups")
+        current = set()
+        for groupid in groupids:
+            group = tree.get_by_id(groupid)
 
-        if self.groups is not None:
-            logging.debug("Comparing group lists")
-            for group in self.groups:
-                groupjson = self.get_group(group)
+            if group is not None and group.get("appliesTo", "") == "":
+                current.add(groupid)
 
-                if groupjson is None:
-                    logging.debug("Group mismatch. No result.")
-                    return True
-                elif groupjson['id'] not in g:
-                    logging.debug("Group mismatch. ID doesn't exist.")
-                    return True
-                else:
-                    g.remove(groupjson['id'])
+        logging.debug("Comparing group lists")
+        desired = set()
+        for path in self.groups:
+            group = tree.get(path)
 
-            if g != []:
-                logging.debug("Group mismatch. New ID exists.")
+            if group is None:
+                logging.debug("Group mismatch. No result.")
                 return True
-            logging.debug("Groups match")
+
+            desired.add(group["id"])
+
+        if desired != current:
+            logging.debug("Group mismatch.")
+            return True
+        logging.debug("Groups match")
 
     def _compare_props(self, propresp, ignore):
         """Function to compare the host's current
         properties against provided properties"""
         logging.debug("Running Host._compare_props...")
         p = {}
+        masked = []
 
         logging.debug("Creating list of properties")
         for prop in propresp:
             if prop["name"] not in ignore:
+                p[prop["name"]] = prop["value"]
+
                 if ("*******" in prop["value"] and
-                   self._verify_property(prop["name"])):
-                    p[prop["name"]] = self.properties[prop["name"]]
-                else:
-                    p[prop["name"]] = prop["value"]
+                   prop["name"] in self.properties):
+                    masked.append(prop["name"])
+
+        # The server won't return masked values (passwords and other
+        # credentials), so ask it to compare all of them at once
+        if masked:
+            logging.debug("Verifying masked properties")
+            if not self._verify_masked("host", masked):
+                logging.debug("Properties mismatch")
+                return True
+
+            for propname in masked:
+                p[propname] = self.properties[propname]
 
         logging.debug("Comparing properties")
         # Iterate provided properties and compare to received properties
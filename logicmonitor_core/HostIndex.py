@@ -0,0 +1,117 @@
+#!/usr/bin/python
+
+import logging
+import threading
+import time
+
+
+class HostIndex(object):
+    """Index of the hosts in an account, keyed by (hostName, agentId),
+    by display name and by id, with lookup hit/miss counts"""
+
+    def __init__(self, hosts=None):
+        logging.debug("Instantiating HostIndex object")
+
+        self.by_id = {}
+        self.by_hostname = {}
+        self.by_displayname = {}
+        self.loaded_at = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+
+        if hosts is not None:
+            self.load(hosts)
+
+    def load(self, hosts, loaded_at=None):
+        """Replace the index with a getHosts snapshot taken
+        at loaded_at (seconds since the epoch, now by default)"""
+        logging.debug("Loading " + str(len(hosts)) + " hosts into index")
+
+        with self._lock:
+            self.by_id = {}
+            self.by_hostname = {}
+            self.by_displayname = {}
+
+            for host in hosts:
+                self._index(host)
+
+            if loaded_at is None:
+                loaded_at = time.time()
+            self.loaded_at = loaded_at
+
+    def is_stale(self, ttl):
+        """Returns true if the index was never loaded or
+        was loaded more than ttl seconds ago"""
+        with self._lock:
+            return (self.loaded_at is None or
+                    time.time() - self.loaded_at > ttl)
+
+    def invalidate(self):
+        with self._lock:
+            self.loaded_at = None
+
+    def record(self, hit):
+        """Count a lookup as answered from the index (hit)
+        or as needing a getHosts call (miss)"""
+        with self._lock:
+            if hit:
+                self.hits = self.hits + 1
+            else:
+                self.misses = self.misses + 1
+
+    def all(self):
+        """Returns a list of every host"""
+        with self._lock:
+            return self.by_id.values()
+
+    def get(self, hostname, collector_id):
+        """Returns the host with the specified hostname
+        on the specified collector, or None"""
+        with self._lock:
+            return self.by_hostname.get((hostname, str(collector_id)))
+
+    def get_by_displayname(self, displayname):
+        """Returns the host with the specified display name, or None"""
+        with self._lock:
+            return self.by_displayname.get(displayname)
+
+    def get_by_id(self, host_id):
+        """Returns the host with the specified id, or None"""
+        with self._lock:
+            return self.by_id.get(str(host_id))
+
+    def add(self, host):
+        """Add or replace a single host, such as one
+        returned by addHost or updateHost"""
+        with self._lock:
+            self.remove(host["id"])
+            self._index(host)
+
+    def remove(self, host_id):
+        with self._lock:
+            host = self.by_id.pop(str(host_id), None)
+            if host is None:
+                return
+
+            key = (host.get("hostName"), str(host.get("agentId")))
+            if self.by_hostname.get(key) is host:
+                del self.by_hostname[key]
+
+            if self.by_displayname.get(host.get("displayedAs")) is host:
+                del self.by_displayname[host["displayedAs"]]
+
+    def metrics(self):
+        with self._lock:
+            return {"size": len(self.by_id),
+                    "hits": self.hits,
+                    "misses": self.misses}
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def _index(self, host):
+        self.by_id[str(host["id"])] = host
+        self.by_hostname.setdefault(
+            (host.get("hostName"), str(host.get("agentId"))), host)
+        self.by_displayname.setdefault(host.get("displayedAs"), host)
@@ -1,20 +1,21 @@
 #!/usr/bin/python
 
-import json
 import logging
+import Deadline
+import Errors
 from LogicMonitor import LogicMonitor
 
 
 class HostList(LogicMonitor):
 
-    def __init__(self, params):
+    def __init__(self, params, session=None):
         """Initializor for the LogicMonitor host list object"""
         logging.basicConfig(level=logging.DEBUG)
         logging.debug("Instantiating HostList")
         self.params = params
         self.groupId = None
 
-        LogicMonitor.__init__(self, **self.params)
+        LogicMonitor.__init__(self, session, **self.params)
 
         if self.params["group"]:
             logging.debug("Group is " + self.params["group"])
@@ -27,26 +28,30 @@ class HostList(LogicMonitor):
             if "id" in group:
                 self.groupId = group["id"]
             else:
-                self.fail(msg="Group " + self.group + " not found.")
+                self.fail(msg="Group " + self.group + " not found.",
+                          error=Errors.NotFoundError)
 
+    @Deadline.bounded
     def get_hosts(self):
         """Returns a hash of the hosts
         associated with this LogicMonitor account"""
         logging.debug("Running HostList.get_hosts...")
 
         logging.debug("Making RPC call to 'getHosts'")
-        properties_json = (json.loads(self.rpc("getHosts",
-                                               {"hostGroupId":
-                                                self.groupId or 1})))
+        properties_json = self.call("getHosts",
+                                    {"hostGroupId": self.groupId or 1})
 
-        if properties_json["status"] == 200:
+        if properties_json.status == 200:
             logging.debug("RPC call succeeded")
-            return properties_json["data"]
+            return properties_json.data
         else:
             logging.debug("Error: there was an issue retrieving the " +
                           "host list")
-            logging.debug(properties_json["errmsg"])
+            logging.debug(properties_json.errmsg)
 
-            self.fail(msg=properties_json["status"])
+            self.fail(
+                msg="Error: Unable to retrieve the host " +
+                    "list.\n%s" % properties_json.errmsg,
+                error=Errors.for_result(properties_json))
 
         return None
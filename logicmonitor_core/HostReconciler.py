@@ -0,0 +1,278 @@
+#!/usr/bin/python
+
+import logging
+import Deadline
+import Errors
+from BatchExecutor import BatchExecutor, BatchResult, batch
+from Host import Host
+
+ADD = "add"
+UPDATE = "update"
+DELETE = "delete"
+NONE = "none"
+ERROR = "error"
+
+# Host parameters a desired-state entry may leave out
+HOST_DEFAULTS = {"hostname": None,
+                 "displayname": None,
+                 "collector": None,
+                 "description": "",
+                 "properties": {},
+                 "groups": None,
+                 "alertenable": True,
+                 "starttime": None,
+                 "duration": 30}
+
+
+class ReconcileResult(BatchResult):
+    """Outcome of reconciling one host. action is one of
+    ADD, UPDATE, DELETE, NONE or ERROR."""
+
+    def __init__(self, item, action, result=None, error=None):
+        BatchResult.__init__(self, item, result, error)
+        self.action = action
+
+    def __repr__(self):
+        if self.ok:
+            return ("<ReconcileResult " + repr(self.item) + " " +
+                    self.action + " ok>")
+        return ("<ReconcileResult " + repr(self.item) + " " +
+                self.action + " error=" + repr(self.error) + ">")
+
+
+class HostReconciler(BatchExecutor):
+    """Brings the hosts of an account in line with a desired-state list.
+    Every entry is compared with one snapshot of the account's hosts,
+    groups and collectors, and only the hosts which differ are written,
+    at most max_concurrency at a time."""
+
+    @batch
+    def plan(self, desired, delete=False, compare_properties=True):
+        """Work out the changes needed without making them.
+
+        desired is a list of Host params dictionaries (hostname,
+        displayname, collector, groups, properties, alertenable and
+        description). Returns a list of (action, target) pairs, where
+        target is a Host for ADD, UPDATE and NONE and a host record for
+        DELETE. Both hostname and displayname are required. An entry
+        without a collector keeps the one its host is on. With delete
+        set, hosts on the collectors named in desired which match no
+        entry are deleted. Entries which are invalid, can't be resolved
+        or whose properties couldn't be fetched are planned as ERROR,
+        with a (display name, exception) target.
+
+        Hosts are compared in memory. Only hosts which otherwise match
+        have their properties fetched (concurrently) and compared, unless
+        compare_properties is false. Raises a LogicMonitorError if the
+        account's hosts, groups or collectors can't be loaded."""
+        logging.debug("Running HostReconciler.plan...")
+
+        steps = []
+        hosts = []
+        for params in desired:
+            # Host would fall back to this machine's FQDN
+            if not params.get("hostname") or not params.get("displayname"):
+                error = ValueError("Error: Desired hosts need both a " +
+                                   "hostname and a displayname")
+                steps.append((ERROR, (params.get("displayname") or
+                                      params.get("hostname"), error)))
+                continue
+
+            hosts.append(Host(dict(HOST_DEFAULTS, **params), self.session))
+
+        # Only collectors named in desired are in scope for deletes.
+        # _resolve() fills in the collector of entries without one.
+        named = [host for host in hosts if host.params["collector"]]
+
+        self.session.collector_index()
+        self.session.host_index()
+        self.session.group_tree()
+
+        resolved = []
+        for host in hosts:
+            try:
+                host.prefetch()
+            except Errors.LogicMonitorError as e:
+                logging.debug("Unable to resolve " + host.displayname +
+                              ": " + str(e))
+                steps.append((ERROR, (host.displayname, e)))
+            else:
+                resolved.append(host)
+
+        unchanged = []
+        for host in resolved:
+            if host.info is None:
+                steps.append((ADD, host))
+            elif self._differs(host):
+                steps.append((UPDATE, host))
+            else:
+                unchanged.append(host)
+
+        if compare_properties:
+            futures = [self.submit(self._properties_differ, host)
+                       for host in unchanged]
+
+            for host, future in zip(unchanged, futures):
+                exc = future.exception()
+
+                if exc is not None:
+                    logging.debug("Comparing properties of " +
+                                  host.displayname + " raised " + repr(exc))
+                    steps.append((ERROR, (host.displayname, exc)))
+                elif future.result():
+                    steps.append((UPDATE, host))
+                else:
+                    steps.append((NONE, host))
+        else:
+            steps.extend([(NONE, host) for host in unchanged])
+
+        if delete:
+            steps.extend([(DELETE, record)
+                          for record in self._unmatched(resolved, named)])
+
+        logging.debug("Planned " + str(len(steps)) + " host changes")
+        return steps
+
+    @Deadline.bounded
+    @batch
+    def reconcile(self, desired, delete=False, compare_properties=True):
+        """Make the account's hosts match desired (see plan()). Returns a
+        ReconcileResult per host naming the action taken. result holds
+        the host record; error holds the LogicMonitorError (or other
+        exception) which made the host fail. A
+        deadline (in seconds) applies to the reconciliation as a whole."""
+        logging.debug("Running HostReconciler.reconcile...")
+
+        try:
+            steps = self.plan(desired, delete, compare_properties)
+        except Errors.LogicMonitorError as e:
+            logging.debug("Unable to plan host changes: " + str(e))
+            return [ReconcileResult(params.get("displayname"), ERROR,
+                                    error=e)
+                    for params in desired]
+
+        futures = iter([self.submit(self._apply, action, target)
+                        for action, target in steps
+                        if action != ERROR])
+
+        results = []
+        for action, target in steps:
+            if action == ERROR:
+                item, exc = target
+                results.append(ReconcileResult(item, action, error=exc))
+                continue
+
+            if isinstance(target, Host):
+                item = target.displayname
+            else:
+                item = target.get("displayedAs")
+
+            future = next(futures)
+            exc = future.exception()
+            if exc is not None:
+                logging.debug("Reconciling " + str(item) + " raised " +
+                              repr(exc))
+                results.append(ReconcileResult(item, action, error=exc))
+                continue
+
+            resp = future.result()
+            if resp is None:
+                results.append(ReconcileResult(item, action,
+                                               result=target.info))
+            elif resp.ok:
+                results.append(ReconcileResult(item, action,
+                                               result=resp.data))
+            else:
+                error = Errors.for_result(resp)(resp.errmsg)
+                results.append(ReconcileResult(item, action, error=error))
+
+        return results
+
+    @staticmethod
+    def summarize(results):
+        """Returns the number of hosts for each action
+        and the number which failed"""
+        summary = {ADD: 0, UPDATE: 0, DELETE: 0, NONE: 0, ERROR: 0,
+                   "failed": 0}
+
+        for result in results:
+            summary[result.action] = summary[result.action] + 1
+            if not result.ok:
+                summary["failed"] = summary["failed"] + 1
+
+        return summary
+
+    def _differs(self, host):
+        """Compare a host with its record in the snapshot, leaving
+        out properties, which the snapshot doesn't hold"""
+        info = host.info
+
+        if (info.get("alertEnable") != host.alertenable or
+           info.get("description") != host.description or
+           info.get("displayedAs") != host.displayname or
+           info.get("hostName") != host.hostname):
+            return True
+
+        if (host.collector is not None and
+           info.get("agentId") != host.collector["id"]):
+            return True
+
+        return host._compare_groups(info) is True
+
+    def _properties_differ(self, host):
+        return host._compare_props(host.get_properties(),
+                                   Host.IGNORED_PROPERTIES) is True
+
+    def _unmatched(self, hosts, named):
+        """Returns the records of hosts on the collectors of the named
+        entries which no desired entry (of hosts) matched"""
+        matched = set()
+        collectors = set()
+
+        for host in hosts:
+            if host.info is not None:
+                matched.add(host.info["id"])
+
+        for host in named:
+            if host.collector is not None:
+                collectors.add(host.collector["id"])
+
+        return [record for record in self.session.hosts.all()
+                if record.get("agentId") in collectors and
+                record["id"] not in matched]
+
+    def _apply(self, action, target):
+        """Make the call for one step. Returns its RPCResult,
+        or None when nothing had to be done."""
+        if action == NONE:
+            return None
+
+        if action == DELETE:
+            logging.debug("Making RPC call to 'deleteHost'")
+            return self.session.call("deleteHost",
+                                     {"hostId": target["id"],
+                                      "deleteFromSystem": True,
+                                      "hostGroupId": 1})
+
+        if not target.params["collector"] or target.collector is None:
+            raise Errors.NotFoundError("Collector " +
+                                       str(target.params["collector"]) +
+                                       " doesn't exist")
+
+        h = target._build_host_hash(target.hostname,
+                                    target.displayname,
+                                    target.collector,
+                                    target.description,
+                                    target.groups,
+                                    target.properties,
+                                    target.alertenable)
+
+        if action == ADD:
+            logging.debug("Making RPC call to 'addHost'")
+            return self.session.call("addHost", h)
+
+        h["id"] = target.info["id"]
+        h["opType"] = "replace"
+
+        logging.debug("Making RPC call to 'updateHost'")
+        return self.session.call("updateHost", h)
@@ -0,0 +1,80 @@
+#!/usr/bin/python
+
+import logging
+import Deadline
+import Errors
+from BatchExecutor import BatchExecutor, BatchResult, batch
+
+
+class HostRemover(BatchExecutor):
+    """Removes many devices from an account at once, at most
+    max_concurrency deleteHost calls at a time"""
+
+    @Deadline.bounded
+    @batch
+    def remove(self, targets):
+        """Delete every device in targets. Each target is either a display
+        name or a (hostname, collector description) pair. All of them
+        are looked up in one snapshot of the account's hosts.
+
+        Returns a BatchResult per target, in the same order. result holds
+        the deleted host record, or None if no such device exists (so
+        removal stays idempotent); error holds the reason a deletion
+        failed. Targets naming the same device share one deletion. A
+        deadline (in seconds) applies to the batch as a whole."""
+        logging.debug("Running HostRemover.remove...")
+
+        targets = list(targets)
+
+        try:
+            hosts = self.session.host_index()
+            if [t for t in targets if not isinstance(t, basestring)]:
+                self.session.collector_index()
+        except Errors.LogicMonitorError as e:
+            logging.debug("Unable to load hosts: " + str(e))
+            return [BatchResult(target, error=e) for target in targets]
+
+        # Resolve every target before deleting anything, so a host
+        # listed twice is deleted once rather than racing itself
+        records = [self._find(hosts, target) for target in targets]
+
+        futures = {}
+        for target, record in zip(targets, records):
+            if record is None:
+                logging.debug("Host " + repr(target) + " not registered")
+            elif record["id"] not in futures:
+                logging.debug("Making RPC call to 'deleteHost'")
+                futures[record["id"]] = self.call("deleteHost",
+                                                  {"hostId": record["id"],
+                                                   "deleteFromSystem": True,
+                                                   "hostGroupId": 1})
+
+        results = []
+        for target, record in zip(targets, records):
+            if record is None:
+                results.append(BatchResult(target))
+                continue
+
+            result = self._rpc_result(target, futures[record["id"]])
+            if result.ok:
+                result.result = record
+            results.append(result)
+
+        logging.debug("Removed " + str(len([r for r in results
+                                            if r.ok and r.result])) +
+                      " of " + str(len(targets)) + " hosts")
+        return results
+
+    def _find(self, hosts, target):
+        """Returns the host record for a target, or None"""
+        if isinstance(target, basestring):
+            return hosts.get_by_displayname(target)
+
+        hostname, description = target
+        collector = self.session.collector_index().get(description)
+
+        if collector is None:
+            logging.debug("Collector " + description + " doesn't exist")
+            return None
+
+        return hosts.get(hostname, collector["id"])
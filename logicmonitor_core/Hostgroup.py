@@ -1,21 +1,22 @@
 #!/usr/bin/python
 
-import json
 import logging
 from datetime import datetime, timedelta
+import Deadline
+import Errors
 from LogicMonitor import LogicMonitor
 
 
 class Hostgroup(LogicMonitor):
 
-    def __init__(self, params):
+    def __init__(self, params, session=None):
         """Initializor for the LogicMonitor host object"""
         logging.basicConfig(level=logging.DEBUG)
         logging.debug("Instantiating Hostgroup object")
         self.change = False
         self.params = params
 
-        LogicMonitor.__init__(self, **self.params)
+        LogicMonitor.__init__(self, session, **self.params)
 
         self.fullpath = self.params["fullpath"]
         self.info = self.get_group(self.fullpath)
@@ -25,6 +26,7 @@ class Hostgroup(LogicMonitor):
         self.duration = self.params["duration"]
         self.alertenable = self.params["alertenable"]
 
+    @Deadline.bounded
     def create(self):
         """Wrapper for self.update()"""
         logging.debug("Running Hostgroup.create...")
@@ -39,17 +41,20 @@ class Hostgroup(LogicMonitor):
             logging.debug("Group found")
 
             logging.debug("Making RPC call to 'getHostGroupProperties'")
-            properties_json = json.loads(self.rpc(
+            properties_json = self.call(
                 "getHostGroupProperties",
                 {'hostGroupId': self.info["id"],
-                 "finalResult": final}))
+                 "finalResult": final})
 
-            if properties_json["status"] == 200:
+            if properties_json.status == 200:
                 logging.debug("RPC call succeeded")
-                return properties_json["data"]
+                return properties_json.data
             else:
                 logging.debug("RPC call failed")
-                self.fail(msg=properties_json["status"])
+                self.fail(
+                    msg="Error: Unable to retrieve group " +
+                        "properties.\n%s" % properties_json.errmsg,
+                    error=Errors.for_result(properties_json))
         else:
             logging.debug("Group not found")
             return None
@@ -68,6 +73,7 @@ class Hostgroup(LogicMonitor):
         logging.debug("Assigning property has to host object")
         self.properties = propertyhash
 
+    @Deadline.bounded
     def add(self):
         """Idempotent function to ensure that the host
         group exists in your LogicMonitor account"""
@@ -89,6 +95,7 @@ class Hostgroup(LogicMonitor):
         else:
             logging.debug("Group already exists")
 
+    @Deadline.bounded
     def update(self):
         """Idempotent function to ensure the device group settings
         (alertenable, properties, etc) in the
@@ -114,16 +121,17 @@ class Hostgroup(LogicMonitor):
                     h["id"] = self.info["id"]
 
                 logging.debug("Making RPC call to 'updateHostGroup'")
-                resp = json.loads(self.rpc("updateHostGroup", h))
+                resp = self.call("updateHostGroup", h)
 
-                if resp["status"] == 200:
+                if resp.status == 200:
                     logging.debug("RPC call succeeded")
-                    return resp["data"]
+                    return resp.data
                 else:
                     logging.debug("RPC call failed")
                     self.fail(
                         msg="Error: Unable to update the " +
-                            "host.\n" + resp["errmsg"])
+                            "host.\n" + resp.errmsg,
+                        error=Errors.for_result(resp))
             else:
                 logging.debug("Group properties match supplied properties. " +
                               "No changes to make")
@@ -139,6 +147,7 @@ class Hostgroup(LogicMonitor):
 
             return self.add()
 
+    @Deadline.bounded
     def remove(self):
         """Idempotent function to ensure the device group
         does not exist in your LogicMonitor account"""
@@ -153,19 +162,19 @@ class Hostgroup(LogicMonitor):
                 self.exit(changed=True)
 
             logging.debug("Making RPC call to 'deleteHostGroup'")
-            resp = json.loads(self.rpc("deleteHostGroup",
-                                       {"hgId": self.info["id"]}))
+            resp = self.call("deleteHostGroup",
+                             {"hgId": self.info["id"]})
 
-            if resp["status"] == 200:
+            if resp.status == 200:
                 logging.debug(resp)
                 logging.debug("RPC call succeeded")
-                return resp
-            elif resp["errmsg"] == "No such group":
+                return resp.body
+            elif resp.errmsg == "No such group":
                 logging.debug("Group doesn't exist")
             else:
                 logging.debug("RPC call failed")
                 logging.debug(resp)
-                self.fail(msg=resp["errmsg"])
+                self.fail(msg=resp.errmsg, error=Errors.for_result(resp))
         else:
             logging.debug("Group doesn't exist")
 
@@ -186,17 +195,24 @@ class Hostgroup(LogicMonitor):
                 return True
 
             p = {}
+            masked = []
 
             logging.debug("Creating list of properties")
             for prop in properties:
                 if prop["name"] not in ignore:
+                    p[prop["name"]] = prop["value"]
+
                     if ("*******" in prop["value"] and
-                       self._verify_property(prop["name"])):
+                       prop["name"] in self.properties):
+                        masked.append(prop["name"])
+
+            if masked:
+                logging.debug("Verifying masked properties")
+                if not self._verify_masked("group", masked):
+                    return True
 
-                        p[prop["name"]] = (
-                            self.properties[prop["name"]])
-                    else:
-                        p[prop["name"]] = prop["value"]
+                for propname in masked:
+                    p[propname] = self.properties[propname]
 
             logging.debug("Comparing properties")
             if set(p) != set(self.properties):
@@ -205,6 +221,15 @@ class Hostgroup(LogicMonitor):
             logging.debug("No property information received")
             return False
 
+    def verify_properties(self, propnames=None):
+        """Check with LogicMonitor server that the supplied values of
+        propnames (by default every supplied property) are the ones set
+        on the group. All of them are verified with a single
+        verifyProperties call. Returns true if they all match."""
+        logging.debug("Running Hostgroup.verify_properties")
+        return self._verify_properties("hostGroupId", "Group", propnames)
+
+    @Deadline.bounded
     def sdt(self, duration=30, starttime=None):
         """Create a scheduled down time
         (maintenance window) for this host"""
@@ -230,16 +255,18 @@ class Hostgroup(LogicMonitor):
 
             # Use user UTC offset
             logging.debug("Making RPC call to 'getTimeZoneSetting'")
-            accountresp = json.loads(self.rpc("getTimeZoneSetting", {}))
+            accountresp = self.call("getTimeZoneSetting", {})
 
-            if accountresp["status"] == 200:
+            if accountresp.status == 200:
                 logging.debug("RPC call succeeded")
 
-                offset = accountresp["data"]["offset"]
+                offset = accountresp.data["offset"]
                 offsetstart = start + timedelta(0, offset)
             else:
                 self.fail(
-                    msg="Error: Unable to retrieve timezone offset")
+                    msg="Error: Unable to retrieve timezone " +
+                        "offset.\n%s" % accountresp.errmsg,
+                    error=Errors.for_result(accountresp))
 
         offsetend = offsetstart + timedelta(0, int(duration)*60)
 
@@ -257,14 +284,34 @@ class Hostgroup(LogicMonitor):
              "endMinute": offsetend.minute}
 
         logging.debug("Making RPC call to setHostGroupSDT")
-        resp = json.loads(self.rpc("setHostGroupSDT", h))
+        resp = self.call("setHostGroupSDT", h)
 
-        if resp["status"] == 200:
+        if resp.status == 200:
             logging.debug("RPC call succeeded")
-            return resp["data"]
+            return resp.data
         else:
             logging.debug("RPC call failed")
-            self.fail(msg=resp["errmsg"])
+            self.fail(msg=resp.errmsg, error=Errors.for_result(resp))
+
+    def add_async(self, client):
+        """Non-blocking form of Hostgroup.add. Runs on the specified
+        AsyncLogicMonitor and returns a Future"""
+        return client.submit(self.add)
+
+    def update_async(self, client):
+        """Non-blocking form of Hostgroup.update. Runs on the specified
+        AsyncLogicMonitor and returns a Future"""
+        return client.submit(self.update)
+
+    def remove_async(self, client):
+        """Non-blocking form of Hostgroup.remove. Runs on the specified
+        AsyncLogicMonitor and returns a Future"""
+        return client.submit(self.remove)
+
+    def sdt_async(self, client):
+        """Non-blocking form of Hostgroup.sdt. Runs on the specified
+        AsyncLogicMonitor and returns a Future"""
+        return client.submit(self.sdt)
 
     def site_facts(self):
         """Output current properties information for the Hostgroup"""
@@ -276,7 +323,8 @@ class Hostgroup(LogicMonitor):
 
             self.output_info(props)
         else:
-            self.fail(msg="Error: Group doesn't exit.")
+            self.fail(msg="Error: Group doesn't exit.",
+                      error=Errors.NotFoundError)
 
     def _build_host_group_hash(self,
                                fullpath,
@@ -320,33 +368,3 @@ class Hostgroup(LogicMonitor):
                 propnum = propnum + 1
 
         return h
-
-    def _verify_property(self, propname):
-        """Check with LogicMonitor server
-        to verify property is unchanged"""
-        logging.debug("Running Hostgroup._verify_property")
-
-        if self.info:
-            logging.debug("Group exists")
-            if propname not in self.properties:
-                logging.debug("Property " + propname + " does not exist")
-                return False
-            else:
-                logging.debug("Property " + propname + " exists")
-                h = {"hostGroupId": self.info["id"],
-                     "propName0": propname,
-                     "propValue0": self.properties[propname]}
-
-                logging.debug("Making RCP call to 'verifyProperties'")
-                resp = json.loads(self.rpc('verifyProperties', h))
-
-                if resp["status"] == 200:
-                    logging.debug("RPC call succeeded")
-                    return resp["data"]["match"]
-                else:
-                    self.fail(
-                        msg="Error: unable to get verification " +
-                            "from server.\n%s" % resp["errmsg"])
-        else:
-            self.fail(
-                msg="Error: Group doesn't exist. Unable to verify properties")
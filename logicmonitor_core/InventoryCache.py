@@ -0,0 +1,134 @@
+#!/usr/bin/python
+
+import contextlib
+import errno
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import time
+
+# Bump whenever the layout of a saved section changes so that
+# files written by older versions are ignored rather than misread
+CACHE_VERSION = 1
+
+
+def default_path(company):
+    """Returns the cache directory used for an account
+    when no other path is given"""
+    return os.path.join(os.path.expanduser("~"), ".cache",
+                        "logicmonitor_core", company)
+
+
+class InventoryCache(object):
+    """On-disk copy of an account's collector, group and host snapshots,
+    so that short-lived processes start warm. Each section is kept in
+    its own file and expires on its own. A lock file serializes
+    processes sharing the directory."""
+
+    def __init__(self, path):
+        logging.debug("Instantiating InventoryCache object at " + path)
+
+        self.path = path
+
+    def load(self, section, ttl):
+        """Returns (data, saved_at) for a section saved less than ttl
+        seconds ago by this cache version, or None"""
+        try:
+            with self._locked(fcntl.LOCK_SH):
+                with open(self._file(section)) as f:
+                    entry = json.load(f)
+        except (IOError, OSError, ValueError) as e:
+            logging.debug("No usable cache for " + section + ": " + str(e))
+            return None
+
+        if not isinstance(entry, dict) or \
+           entry.get("version") != CACHE_VERSION:
+            logging.debug("Ignoring " + section +
+                          " cache from another version")
+            return None
+
+        saved_at = entry.get("saved_at")
+        if saved_at is None or time.time() - saved_at > ttl:
+            logging.debug("Cached " + section + " are stale")
+            return None
+
+        logging.debug("Using cached " + section)
+        return entry.get("data"), saved_at
+
+    def save(self, section, data, fetched_at=None):
+        """Write a section snapshot, fetched from the portal at fetched_at
+        (by default now). A snapshot fetched before the section was last
+        invalidated is out of date and isn't saved. Failures are logged
+        and otherwise ignored."""
+        if fetched_at is None:
+            fetched_at = time.time()
+
+        entry = {"version": CACHE_VERSION,
+                 "saved_at": fetched_at,
+                 "data": data}
+
+        try:
+            self._makedirs()
+
+            with self._locked(fcntl.LOCK_EX):
+                if self._invalidated_at(section) >= fetched_at:
+                    logging.debug("Not caching " + section + ". It was " +
+                                  "invalidated during the fetch.")
+                    return
+
+                # Write then rename, so a crash never leaves a torn file
+                fd, tmp = tempfile.mkstemp(dir=self.path,
+                                           prefix="." + section)
+                with os.fdopen(fd, "w") as f:
+                    json.dump(entry, f)
+                os.rename(tmp, self._file(section))
+        except (IOError, OSError) as e:
+            logging.debug("Unable to cache " + section + ": " + str(e))
+
+    def invalidate(self, section):
+        """Discard a section so the next process fetches it again. The
+        time is noted so snapshots fetched before now aren't saved."""
+        try:
+            self._makedirs()
+
+            with self._locked(fcntl.LOCK_EX):
+                with open(self._marker(section), "w") as f:
+                    f.write(repr(time.time()))
+
+                os.remove(self._file(section))
+        except (IOError, OSError) as e:
+            if e.errno != errno.ENOENT:
+                logging.debug("Unable to invalidate cached " + section +
+                              ": " + str(e))
+
+    def _file(self, section):
+        return os.path.join(self.path, section + ".json")
+
+    def _marker(self, section):
+        return os.path.join(self.path, "." + section + ".invalidated")
+
+    def _invalidated_at(self, section):
+        """Returns when a section was last invalidated, or 0"""
+        try:
+            with open(self._marker(section)) as f:
+                return float(f.read())
+        except (IOError, OSError, ValueError):
+            return 0
+
+    def _makedirs(self):
+        try:
+            os.makedirs(self.path, 0700)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    @contextlib.contextmanager
+    def _locked(self, operation):
+        with open(os.path.join(self.path, ".lock"), "a") as lock:
+            fcntl.flock(lock, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
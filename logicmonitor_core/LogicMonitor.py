@@ -1,199 +1,82 @@
 #!/usr/bin/python
 
-import json
 import logging
-import socket
 import sys
-import urllib
-import urllib2
+import Errors
+import SecretStore
+from LogicMonitorSession import LogicMonitorSession
 
 
 class LogicMonitor(object):
 
-    def __init__(self, **params):
-        self.__version__ = "1.0-python"
+    def __init__(self, session=None, **params):
         logging.debug("Instantiating LogicMonitor object")
 
         self.check_mode = False
-        self.company = params["company"]
-        self.user = params["user"]
-        self.password = params["password"]
-        self.fqdn = socket.getfqdn()
-        self.lm_url = "logicmonitor.com/santaba"
-        self.urlopen = urllib2.urlopen
 
-    def rpc(self, action, params):
-        """Make a call to the LogicMonitor RPC library
-        and return the response"""
-        logging.debug("Running LogicMonitor.rpc")
+        if session is None:
+            session = LogicMonitorSession.shared(**params)
+        self.session = session
 
-        param_str = urllib.urlencode(params)
-        creds = urllib.urlencode(
-            {"c": self.company,
-             "u": self.user,
-             "p": self.password})
+    @property
+    def company(self):
+        return self.session.company
 
-        if param_str:
-            param_str = param_str + "&"
+    @property
+    def user(self):
+        return self.session.user
 
-        param_str = param_str + creds
+    @property
+    def password(self):
+        return self.session.password
 
-        try:
-            url = ("https://" + self.company + "." + self.lm_url +
-                   "/rpc/" + action + "?" + param_str)
+    @property
+    def fqdn(self):
+        return self.session.fqdn
 
-            # Set headers
-            req = urllib2.Request(url)
-            req.add_header("X-LM-User-Agent", self.__version__)
-            f = self.urlopen(req)
+    def rpc(self, action, params):
+        """Make a call to the LogicMonitor RPC library
+        and return the response"""
+        return self.session.rpc(action, params)
 
-            raw = f.read()
-            resp = json.loads(raw)
-            if resp["status"] == 403:
-                logging.debug("Authentication failed.")
-                self.fail(msg="Error: " + resp["errmsg"])
-            else:
-                return raw
-        except IOError as ioe:
-            logging.debug(ioe)
-            self.fail(msg="Error: Unknown exception making RPC call")
+    def call(self, action, params):
+        """Make a call to the LogicMonitor RPC library
+        and return the decoded RPCResult"""
+        return self.session.call(action, params)
 
     def do(self, action, params):
         """Make a call to the LogicMonitor
          server \"do\" function"""
-        logging.debug("Running LogicMonitor.do...")
-
-        param_str = urllib.urlencode(params)
-        creds = (urllib.urlencode(
-            {"c": self.company,
-                "u": self.user,
-                "p": self.password}))
-
-        if param_str:
-            param_str = param_str + "&"
-        param_cred_str = param_str + creds
-
-        try:
-            # log param string without credentials
-            logging.debug("Attempting to open URL: " +
-                          "https://" + self.company + "." + self.lm_url +
-                          "/do/" + action + "?" + param_str)
-            f = self.urlopen(
-                "https://" + self.company + "." + self.lm_url +
-                "/do/" + action + "?" + param_cred_str)
-            return f.read()
-        except IOError as ioe:
-            logging.debug("Error opening URL. " + ioe)
-            self.fail("Unknown exception opening URL")
+        return self.session.do(action, params)
+
+    def download(self, action, params, path, progress=None):
+        """Stream the body of a \"do\" call to the file at path"""
+        return self.session.download(action, params, path, progress)
 
     def get_collectors(self):
         """Returns a JSON object containing a list of
         LogicMonitor collectors"""
-        logging.debug("Running LogicMonitor.get_collectors...")
-
-        logging.debug("Making RPC call to 'getAgents'")
-        resp = self.rpc("getAgents", {})
-        resp_json = json.loads(resp)
-
-        if resp_json["status"] is 200:
-            logging.debug("RPC call succeeded")
-            return resp_json["data"]
-        else:
-            self.fail(msg=resp)
+        return self.session.get_collectors()
 
     def get_host_by_hostname(self, hostname, collector):
         """Returns a host object for the host matching the
         specified hostname"""
-        logging.debug("Running LogicMonitor.get_host_by_hostname...")
-
-        logging.debug("Looking for hostname " + hostname)
-        logging.debug("Making RPC call to 'getHosts'")
-        hostlist_json = json.loads(self.rpc("getHosts", {"hostGroupId": 1}))
-
-        if collector:
-            if hostlist_json["status"] == 200:
-                logging.debug("RPC call succeeded")
-
-                hosts = hostlist_json["data"]["hosts"]
-
-                logging.debug(
-                    "Looking for host matching: hostname " + hostname +
-                    " and collector " + str(collector["id"]))
-
-                for host in hosts:
-                    if (host["hostName"] == hostname and
-                       host["agentId"] == collector["id"]):
-
-                        logging.debug("Host match found")
-                        return host
-                logging.debug("No host match found")
-                return None
-            else:
-                logging.debug("RPC call failed")
-                logging.debug(hostlist_json)
-        else:
-            logging.debug("No collector specified")
-            return None
+        return self.session.get_host_by_hostname(hostname, collector)
 
     def get_host_by_displayname(self, displayname):
         """Returns a host object for the host matching the
         specified display name"""
-        logging.debug("Running LogicMonitor.get_host_by_displayname...")
-
-        logging.debug("Looking for displayname " + displayname)
-        logging.debug("Making RPC call to 'getHost'")
-        host_json = (json.loads(self.rpc("getHost",
-                                {"displayName": displayname})))
-
-        if host_json["status"] == 200:
-            logging.debug("RPC call succeeded")
-            return host_json["data"]
-        else:
-            logging.debug("RPC call failed")
-            logging.debug(host_json)
-            return None
+        return self.session.get_host_by_displayname(displayname)
 
     def get_collector_by_description(self, description):
         """Returns a JSON collector object for the collector
         matching the specified FQDN (description)"""
-        logging.debug("Running LogicMonitor.get_collector_by_description...")
-
-        collector_list = self.get_collectors()
-        if collector_list is not None:
-            logging.debug("Looking for collector with description " +
-                          description)
-            for collector in collector_list:
-                if collector["description"] == description:
-                    logging.debug("Collector match found")
-                    return collector
-        logging.debug("No collector match found")
-        return None
+        return self.session.get_collector_by_description(description)
 
     def get_group(self, fullpath):
         """Returns a JSON group object for the group matching the
         specified path"""
-        logging.debug("Running LogicMonitor.get_group...")
-
-        logging.debug("Making RPC call to getHostGroups")
-        resp = json.loads(self.rpc("getHostGroups", {}))
-
-        if resp["status"] == 200:
-            logging.debug("RPC called succeeded")
-            groups = resp["data"]
-
-            logging.debug("Looking for group matching " + fullpath)
-            for group in groups:
-                if group["fullPath"] == fullpath.lstrip('/'):
-                    logging.debug("Group match found")
-                    return group
-
-            logging.debug("No group match found")
-            return None
-        else:
-            logging.debug("RPC call failed")
-            logging.debug(resp)
-
-        return None
+        return self.session.get_group(fullpath)
 
     def create_group(self, fullpath):
         """Recursively create a path of device groups.
@@ -246,30 +129,103 @@ class LogicMonitor(object):
                      "description": ""}
 
             logging.debug("Making RPC call to 'addHostGroup'")
-            resp = json.loads(
-                self.rpc("addHostGroup", h))
+            resp = self.call("addHostGroup", h)
 
-            if resp["status"] == 200:
+            if resp.status == 200:
                 logging.debug("RPC call succeeded")
-                return resp["data"]["id"]
-            elif resp["errmsg"] == "The record already exists":
+                return resp.data["id"]
+            elif resp.errmsg == "The record already exists":
                 logging.debug("The hostgroup already exists")
+                self.session.group_tree(refresh=True)
                 group = self.get_group(fullpath)
                 return group["id"]
             else:
                 logging.debug("RPC call failed")
                 self.fail(
                     msg="Error: unable to create new hostgroup \"" + name +
-                        "\".\n" + resp["errmsg"])
+                        "\".\n" + resp.errmsg,
+                    error=Errors.for_result(resp))
+
+    def _verify_properties(self, idkey, name, propnames=None):
+        """Check with LogicMonitor server that the supplied values of
+        propnames (by default every supplied property) are the ones set
+        on this host or group, with a single verifyProperties call.
+        idkey is the call's id parameter and name what the object is
+        called in errors. Returns true if they all match."""
+        if propnames is None:
+            propnames = self.properties.keys()
+
+        if not self.info:
+            self.fail(
+                msg="Error: " + name +
+                    " doesn't exist. Unable to verify properties",
+                error=Errors.NotFoundError)
+
+        missing = [p for p in propnames if p not in self.properties]
+        if missing:
+            logging.debug("Property " + missing[0] + " does not exist")
+            return False
+
+        if not propnames:
+            return True
+
+        h = {idkey: self.info["id"]}
+        for index, propname in enumerate(sorted(propnames)):
+            h["propName" + str(index)] = propname
+            h["propValue" + str(index)] = self.properties[propname]
+
+        logging.debug("Making RCP call to 'verifyProperties'")
+        resp = self.call('verifyProperties', h)
+
+        if resp.status == 200:
+            logging.debug("RPC call succeeded")
+            return resp.data["match"]
+        else:
+            self.fail(
+                msg="Error: unable to get verification " +
+                    "from server.\n%s" % resp.errmsg,
+                error=Errors.for_result(resp))
+
+    def _verify_masked(self, kind, propnames):
+        """Returns true if the supplied values of the masked properties
+        propnames are the ones set on this host or group. Values found in
+        the session's secret store (if any) are trusted; the rest are
+        verified with the server and then recorded."""
+        secrets = self.session.secrets
+        version = SecretStore.object_version(self.info)
+
+        # Hashes can only be trusted for a known version of the object
+        if version is None:
+            secrets = None
+
+        if secrets is not None:
+            propnames = secrets.unmatched(
+                kind, self.info["id"], version,
+                dict((p, self.properties[p]) for p in propnames))
 
-    def fail(self, msg):
-        logging.warning(msg)
-        print(msg)
-        sys.exit(1)
+            if not propnames:
+                logging.debug("Masked properties match the values written")
+                return True
+
+        if not self.verify_properties(propnames):
+            return False
+
+        if secrets is not None:
+            secrets.record(kind, self.info["id"], version,
+                           dict((p, self.properties[p]) for p in propnames),
+                           replace=False)
+
+        return True
+
+    def fail(self, msg, error=None):
+        self.session.fail(msg, error)
 
     def exit(self, changed):
-        print("Changed: " + changed)
-        print("Changed: " + changed)
+        if self.session.raise_errors or Errors.raising():
+            raise Errors.CheckModeExit(changed)
+
+        print("Changed: " + str(changed))
+        print("Changed: " + str(changed))
         sys.exit(0)
 
     def output_info(self, info):
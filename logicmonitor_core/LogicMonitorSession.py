@@ -0,0 +1,833 @@
+#!/usr/bin/python
+
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import urllib
+import Actions
+import CollectorIndex
+import Deadline
+import Errors
+import GroupTree
+import HostIndex
+import InventoryCache
+import RateLimiter
+import ResponseCache
+import Retry
+import SecretStore
+import SingleFlight
+import Transport
+from RPCResult import RPCResult
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Saved next to a partial download, holding the ETag or Last-Modified
+# value of the response it came from, so it is only ever resumed from
+# the same file
+VALIDATOR_SUFFIX = ".validator"
+
+# The inventory cache section each write action changes
+CACHED_WRITES = {"addHostGroup": "groups",
+                 "updateHostGroup": "groups",
+                 "deleteHostGroup": "groups",
+                 "addHost": "hosts",
+                 "updateHost": "hosts",
+                 "deleteHost": "hosts",
+                 "addAgent": "collectors",
+                 "updateAgent": "collectors",
+                 "deleteAgent": "collectors"}
+
+# Parameters which change how a session behaves. Callers only share a
+# session if they agree on all of these as well as on the credentials.
+SESSION_OPTIONS = ("lm_url", "pool_size", "connect_timeout", "read_timeout",
+                   "retry_policies", "raise_errors", "failure_threshold",
+                   "reset_timeout", "read_rate", "write_rate", "group_ttl",
+                   "collector_ttl", "host_ttl", "memo_ttl", "memo_entries",
+                   "memo_bytes", "cache", "secret_store", "secret_ttl")
+
+
+class LogicMonitorSession(object):
+    """A LogicMonitor API client holding the credentials, transport and
+    caches for one account. Sessions are safe to share between threads
+    and between any number of resource objects."""
+
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+
+    def __init__(self, **params):
+        self.__version__ = "1.0-python"
+        logging.debug("Instantiating LogicMonitorSession object")
+
+        self.company = params["company"]
+        self.user = params["user"]
+        self.password = params["password"]
+        self.lm_url = params.get("lm_url", "logicmonitor.com/santaba")
+        self.pool_size = params.get("pool_size", Transport.DEFAULT_POOL_SIZE)
+        self.connect_timeout = params.get("connect_timeout", 10)
+        self.read_timeout = params.get("read_timeout", 120)
+        self.retry_policies = params.get("retry_policies", {})
+        self.raise_errors = params.get("raise_errors", False)
+        self.circuit_breaker = Retry.CircuitBreaker(
+            params.get("failure_threshold", 5),
+            params.get("reset_timeout", 30))
+        self.rate_limiter = RateLimiter.RateLimiter(
+            params.get("read_rate", RateLimiter.DEFAULT_READ_RATE),
+            params.get("write_rate", RateLimiter.DEFAULT_WRITE_RATE))
+
+        self.group_ttl = params.get("group_ttl", 300)
+        self.groups = GroupTree.GroupTree()
+        self.collector_ttl = params.get("collector_ttl", 300)
+        self.collectors = CollectorIndex.CollectorIndex()
+        self.host_ttl = params.get("host_ttl", 300)
+        self.hosts = HostIndex.HostIndex()
+        self.flights = SingleFlight.SingleFlight()
+        self.memo = ResponseCache.ResponseCache(
+            Actions.MEMOIZED_ACTIONS,
+            params.get("memo_ttl", ResponseCache.DEFAULT_TTL),
+            params.get("memo_entries", ResponseCache.DEFAULT_MAX_ENTRIES),
+            params.get("memo_bytes", ResponseCache.DEFAULT_MAX_BYTES))
+
+        # Optional on-disk copy of the indexes. True uses the
+        # default location, a string is taken as the directory.
+        cache = params.get("cache")
+        if cache is True:
+            cache = InventoryCache.default_path(self.company)
+        if cache:
+            self.cache = InventoryCache.InventoryCache(cache)
+        else:
+            self.cache = None
+
+        # Optional store of hashes of the property values written, so
+        # masked values don't have to be verified with the server
+        secrets = params.get("secret_store")
+        if secrets is True:
+            secrets = self.cache or InventoryCache.InventoryCache(
+                InventoryCache.default_path(self.company))
+        elif secrets:
+            secrets = InventoryCache.InventoryCache(secrets)
+
+        if secrets:
+            self.secrets = SecretStore.SecretStore(
+                secrets, params.get("secret_ttl", SecretStore.DEFAULT_TTL))
+        else:
+            self.secrets = None
+
+        self._lock = threading.RLock()
+        self._groups_lock = threading.Lock()
+        self._collectors_lock = threading.Lock()
+        self._hosts_lock = threading.Lock()
+        self._fqdn = None
+
+        host, self.base_path = self.lm_url.split("/", 1)
+        self.pool = Transport.get_pool(self.company + "." + host,
+                                       maxsize=self.pool_size)
+
+    @classmethod
+    def shared(cls, **params):
+        """Returns the session shared by every caller using the same
+        account, credentials and session options, creating it if
+        necessary"""
+        key = (params["company"],
+               params["user"],
+               params["password"],
+               tuple(_option_key(params.get(name))
+                     for name in SESSION_OPTIONS))
+
+        with cls._sessions_lock:
+            session = cls._sessions.get(key)
+
+            if session is None:
+                session = cls(**params)
+                cls._sessions[key] = session
+
+        return session
+
+    @property
+    def fqdn(self):
+        """The FQDN of the local machine, looked up once per session"""
+        with self._lock:
+            if self._fqdn is None:
+                self._fqdn = socket.getfqdn()
+
+        return self._fqdn
+
+    def rpc(self, action, params):
+        """Make a call to the LogicMonitor RPC library
+        and return the raw response"""
+        return self.call(action, params).raw
+
+    def call(self, action, params):
+        """Make a call to the LogicMonitor RPC library and return
+        the response as an RPCResult, decoded exactly once"""
+        logging.debug("Running LogicMonitorSession.call")
+
+        raw = self.memo.get(action, params)
+        if raw is not None:
+            logging.debug("Using memoized response to " + action)
+            return self._parse_rpc(raw)
+
+        try:
+            resp = self._parse_rpc(self._send_rpc(action, params))
+        except IOError as ioe:
+            logging.debug(ioe)
+            self.fail(msg="Error: Unknown exception making RPC call. " +
+                          str(ioe),
+                      error=Errors.TransportError)
+
+        invalidated = Actions.invalidated_by(action)
+        if invalidated is None or invalidated:
+            self.memo.invalidate(invalidated)
+
+        if resp is not None and resp.ok:
+            self.memo.put(action, params, resp.raw)
+            self._apply_write(action, params, resp)
+
+        return resp
+
+    def do(self, action, params):
+        """Make a call to the LogicMonitor
+         server \"do\" function"""
+        logging.debug("Running LogicMonitorSession.do...")
+
+        try:
+            # log param string without credentials
+            logging.debug("Attempting to open URL: " +
+                          "https://" + self.company + "." + self.lm_url +
+                          "/do/" + action + "?" + urllib.urlencode(params))
+            return self._request("do", action, params)
+        except IOError as ioe:
+            logging.debug("Error opening URL. " + str(ioe))
+            self.fail("Unknown exception opening URL",
+                      error=Errors.TransportError)
+
+    def download(self, action, params, path, progress=None, md5=None):
+        """Stream the body of a \"do\" call to the file at path.
+
+        The body is written in DOWNLOAD_CHUNK_SIZE pieces to path + ".part"
+        and an interrupted transfer resumes from where it stopped using an
+        HTTP Range request, including one left behind by an earlier run.
+        Resumes are conditional (If-Range) on the file being unchanged,
+        and a partial download whose origin can't be checked is restarted.
+        Once the size (and the MD5, if md5 is given or the server sends
+        Content-MD5) checks out, the file is renamed into place.
+        progress(bytes_done, bytes_total, bytes_per_second) is called
+        after each chunk. bytes_total is None if unknown."""
+        logging.debug("Running LogicMonitorSession.download...")
+
+        policy = self.retry_policy(action)
+        url = self._build_path("do", action, params)
+        partial = path + ".part"
+        expected = {"size": None, "md5": md5}
+        attempt = 0
+
+        while True:
+            self._admit(action, attempt)
+
+            try:
+                self._download_to(action, url, partial, progress, expected)
+            except IOError as ioe:
+                delay = self._retry_delay(policy, attempt, action, ioe)
+                if delay is None:
+                    self._record_failure(ioe)
+                    raise
+
+                time.sleep(delay)
+                attempt = attempt + 1
+            else:
+                self.circuit_breaker.record_success()
+                break
+
+        self._verify_download(partial, expected["size"], expected["md5"])
+        os.rename(partial, path)
+        _remove(partial + VALIDATOR_SUFFIX)
+
+        logging.debug("Download saved to " + path)
+        return path
+
+    def flush(self):
+        """Write out changes the session has buffered, which
+        at present are those to the secret store"""
+        if self.secrets is not None:
+            self.secrets.flush()
+
+    def metrics(self):
+        """Returns a dictionary of client-side
+        metrics for this session"""
+        return {"rate_limiter": self.rate_limiter.metrics(),
+                "circuit_breaker": self.circuit_breaker.state,
+                "groups": len(self.groups),
+                "collectors": self.collectors.metrics(),
+                "hosts": self.hosts.metrics(),
+                "memo": self.memo.metrics(),
+                "single_flight": self.flights.metrics()}
+
+    def group_tree(self, refresh=False):
+        """Returns the GroupTree for this account. It is loaded with a
+        single getHostGroups call when first needed, when it is more than
+        group_ttl seconds old, or when refresh is set."""
+        with self._groups_lock:
+            if refresh or self.groups.is_stale(self.group_ttl):
+                cached = self._from_cache("groups", self.group_ttl, refresh)
+                if cached is not None:
+                    self.groups.load(*cached)
+                    return self.groups
+
+                logging.debug("Making RPC call to getHostGroups")
+                fetched_at = time.time()
+                resp = self.call("getHostGroups", {})
+
+                if resp.status == 200:
+                    logging.debug("RPC call succeeded")
+                    self.groups.load(resp.data)
+                    self._to_cache("groups", resp.data, fetched_at)
+                else:
+                    self.fail(msg=resp.raw, error=Errors.for_result(resp))
+
+        return self.groups
+
+    def collector_index(self, refresh=False):
+        """Returns the CollectorIndex for this account. It is loaded with a
+        single getAgents call when first needed, when it is more than
+        collector_ttl seconds old, or when refresh is set."""
+        with self._collectors_lock:
+            stale = refresh or self.collectors.is_stale(self.collector_ttl)
+            self.collectors.record(hit=not stale)
+
+            if stale:
+                cached = self._from_cache("collectors", self.collector_ttl,
+                                          refresh)
+                if cached is not None:
+                    self.collectors.load(*cached)
+                    return self.collectors
+
+                logging.debug("Making RPC call to 'getAgents'")
+                fetched_at = time.time()
+                resp = self.call("getAgents", {})
+
+                if resp.status == 200:
+                    logging.debug("RPC call succeeded")
+                    self.collectors.load(resp.data)
+                    self._to_cache("collectors", resp.data, fetched_at)
+                else:
+                    self.fail(msg=resp.raw, error=Errors.for_result(resp))
+
+        return self.collectors
+
+    def host_index(self, refresh=False):
+        """Returns the HostIndex for this account. It is loaded with a
+        single getHosts call for the root group when first needed, when
+        it is more than host_ttl seconds old, or when refresh is set."""
+        with self._hosts_lock:
+            stale = refresh or self.hosts.is_stale(self.host_ttl)
+            self.hosts.record(hit=not stale)
+
+            if stale:
+                cached = self._from_cache("hosts", self.host_ttl, refresh)
+                if cached is not None:
+                    self.hosts.load(*cached)
+                    return self.hosts
+
+                logging.debug("Making RPC call to 'getHosts'")
+                fetched_at = time.time()
+                resp = self.call("getHosts", {"hostGroupId": 1})
+
+                if resp.status == 200:
+                    logging.debug("RPC call succeeded")
+                    self.hosts.load(resp.data["hosts"])
+                    self._to_cache("hosts", resp.data["hosts"], fetched_at)
+                else:
+                    self.fail(msg=resp.raw, error=Errors.for_result(resp))
+
+        return self.hosts
+
+    def retry_policy(self, action):
+        """Returns the RetryPolicy used for calls to the specified action.
+        Policies can be overridden per action with the retry_policies
+        session parameter."""
+        policy = self.retry_policies.get(action)
+
+        if policy is None:
+            policy = Retry.default_policy(action)
+
+        return policy
+
+    def _send_rpc(self, action, params):
+        """Make an RPC call and return the response body. Identical
+        reads made while one is already in flight share its response."""
+        if not Actions.is_read(action):
+            return self._request("rpc", action, params)
+
+        return self.flights.do(
+            ResponseCache.call_key(action, params),
+            lambda: self._request("rpc", action, params))
+
+    def _request(self, kind, action, params):
+        """Send an rpc or do call and return the response body,
+        retrying transient failures according to the action's
+        retry policy while the circuit breaker allows it"""
+        policy = self.retry_policy(action)
+        path = self._build_path(kind, action, params)
+        attempt = 0
+
+        while True:
+            self._admit(action, attempt)
+
+            try:
+                f = self.urlopen(path)
+                self.rate_limiter.update(action, f)
+                self._check_status(f)
+                raw = f.read()
+            except IOError as ioe:
+                delay = self._retry_delay(policy, attempt, action, ioe)
+                if delay is None:
+                    self._record_failure(ioe)
+                    raise
+
+                time.sleep(delay)
+                attempt = attempt + 1
+            else:
+                self.circuit_breaker.record_success()
+                return raw
+
+    def _apply_write(self, action, params, resp):
+        """Keep the session's indexes in step with a successful write"""
+        if action == "addHostGroup":
+            self.groups.add(resp.data)
+        elif action == "updateHostGroup":
+            if isinstance(resp.data, dict) and "id" in resp.data:
+                self.groups.add(resp.data)
+            else:
+                self.groups.invalidate()
+        elif action == "deleteHostGroup":
+            self.groups.remove(params.get("hgId"))
+        elif action in ("addHost", "updateHost"):
+            if isinstance(resp.data, dict) and "id" in resp.data:
+                self.hosts.add(resp.data)
+            else:
+                self.hosts.invalidate()
+        elif action == "deleteHost":
+            self.hosts.remove(params.get("hostId"))
+        elif action == "addAgent":
+            self.collectors.add(resp.data)
+        elif action == "updateAgent":
+            self.collectors.invalidate()
+        elif action == "deleteAgent":
+            self.collectors.remove(params.get("id"))
+
+        if self.secrets is not None:
+            self._record_secrets(action, params, resp)
+
+        # Other processes sharing the cache fetch the section again
+        if self.cache is not None and action in CACHED_WRITES:
+            self.cache.invalidate(CACHED_WRITES[action])
+
+    def _record_secrets(self, action, params, resp):
+        """Record the properties set by a successful add or
+        update, and forget those of a deleted object"""
+        if action in ("addHost", "updateHost"):
+            kind = "host"
+        elif action in ("addHostGroup", "updateHostGroup"):
+            kind = "group"
+        elif action == "deleteHost":
+            self.secrets.forget("host", params.get("hostId"))
+            return
+        elif action == "deleteHostGroup":
+            self.secrets.forget("group", params.get("hgId"))
+            return
+        else:
+            return
+
+        # Hashes are only valid for a known version of the object. Any
+        # recorded for an older version no longer match anyway.
+        data = resp.data
+        version = SecretStore.object_version(data)
+        if version is None or "id" not in data:
+            return
+
+        properties = {}
+        propnum = 0
+        while "propName" + str(propnum) in params:
+            properties[params["propName" + str(propnum)]] = (
+                params.get("propValue" + str(propnum)))
+            propnum = propnum + 1
+
+        self.secrets.record(kind, data["id"], version, properties)
+
+    def _from_cache(self, section, ttl, refresh):
+        if self.cache is None or refresh:
+            return None
+        return self.cache.load(section, ttl)
+
+    def _to_cache(self, section, data, fetched_at):
+        if self.cache is not None:
+            self.cache.save(section, data, fetched_at)
+
+    def _admit(self, action, attempt=0):
+        """Wait until a call to action may be sent, raising
+        IOError if the circuit is open or the deadline has passed.
+        Retries of a call already let through (attempt > 0) only
+        stop if another call has since opened the circuit."""
+        breaker = self.circuit_breaker
+
+        # Checked before allow(), which may hand this call the half-open
+        # trial. Time spent waiting for the rate limiter is caught by
+        # urlopen(), where the outcome is recorded.
+        deadline = Deadline.current()
+        if deadline is not None and deadline.expired():
+            raise Deadline.DeadlineExceeded(
+                "Deadline exceeded before call to " + action)
+
+        if attempt:
+            admitted = breaker.state != breaker.OPEN
+        else:
+            admitted = breaker.allow()
+
+        if not admitted:
+            raise IOError("Portal unavailable. Circuit breaker is open.")
+
+        self.rate_limiter.acquire(action)
+
+    def _record_failure(self, ioe):
+        """Record a call which failed for good with the circuit breaker.
+        Only the final outcome of a call counts, not each attempt, so
+        retries of one flaky call can't open the circuit by themselves."""
+        if isinstance(ioe, Deadline.DeadlineExceeded):
+            # Our own time ran out. That says nothing about the portal,
+            # so if this was the half-open trial another call may try.
+            self.circuit_breaker.release()
+            return
+
+        status = getattr(ioe, "status", None)
+
+        if status is None or status >= 500:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+    def _retry_delay(self, policy, attempt, action, ioe):
+        """Returns the seconds to wait before retrying
+        a failed attempt, or None to give up"""
+        delay = policy.get_delay(attempt, ioe)
+        remaining = Deadline.remaining()
+
+        if delay is None or (remaining is not None and delay >= remaining):
+            return None
+
+        logging.debug("Call to " + action + " failed (" + str(ioe) +
+                      "). Retrying in %.2f seconds" % delay)
+        return delay
+
+    def _download_to(self, action, url, partial, progress, expected):
+        """Append the rest of a download to partial, or restart it if the
+        server won't resume. The size and MD5 the server announces are
+        recorded in expected."""
+        offset = 0
+        validator = None
+        if os.path.exists(partial):
+            offset = os.path.getsize(partial)
+            validator = _read_validator(partial)
+
+        if offset and validator is None:
+            logging.debug("Partial download can't be validated. Restarting.")
+            os.remove(partial)
+            offset = 0
+
+        # Ranges and sizes have to refer to the file itself,
+        # not to a compressed encoding of it
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            logging.debug("Resuming download at byte " + str(offset))
+            headers["Range"] = "bytes=" + str(offset) + "-"
+            headers["If-Range"] = validator
+
+        f = self.urlopen(url, headers)
+        self.rate_limiter.update(action, f)
+
+        if f.status == 416 and offset:
+            logging.debug("Server can't resume download. Restarting.")
+            f.read()
+            os.remove(partial)
+            return self._download_to(action, url, partial, progress,
+                                     expected)
+
+        self._check_status(f)
+
+        if f.status == 206:
+            mode = "ab"
+            total = f.getheader("Content-Range", "").rsplit("/", 1)[-1]
+        else:
+            mode = "wb"
+            offset = 0
+            total = f.getheader("Content-Length")
+            expected["md5"] = (expected["md5"] or
+                               _content_md5(f.getheader("Content-MD5")))
+
+        try:
+            total = int(total)
+            expected["size"] = total
+        except (TypeError, ValueError):
+            total = expected["size"]
+
+        done = offset
+        started = time.time()
+        logged = started
+
+        with open(partial, mode) as out:
+            if mode == "wb":
+                _save_validator(partial, f)
+
+            while True:
+                chunk = f.read(DOWNLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                out.write(chunk)
+                done = done + len(chunk)
+
+                now = time.time()
+                rate = (done - offset) / max(now - started, 0.001)
+
+                if progress is not None:
+                    progress(done, total, rate)
+
+                if now - logged >= 5:
+                    logging.debug("Downloaded " + str(done) + " of " +
+                                  str(total) + " bytes (%d KB/s)" %
+                                  (rate / 1024))
+                    logged = now
+
+        if total is not None and done < total:
+            raise IOError("Connection closed after " + str(done) +
+                          " of " + str(total) + " bytes")
+
+    def _verify_download(self, partial, total, md5):
+        """Check a finished download against its expected size and
+        checksum, discarding it if either doesn't match"""
+        size = os.path.getsize(partial)
+
+        if total is not None and size != total:
+            os.remove(partial)
+            _remove(partial + VALIDATOR_SUFFIX)
+            raise IOError("Download is " + str(size) + " bytes. " +
+                          "Expected " + str(total) + ".")
+
+        if md5 is not None:
+            digest = hashlib.md5()
+
+            with open(partial, "rb") as f:
+                for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), ""):
+                    digest.update(chunk)
+
+            if digest.hexdigest() != md5.lower():
+                os.remove(partial)
+                _remove(partial + VALIDATOR_SUFFIX)
+                raise IOError("Download checksum mismatch")
+
+    def _build_path(self, kind, action, params):
+        """Return the portal path for an rpc or do call, with
+        the account credentials appended to the query string"""
+        param_str = urllib.urlencode(params)
+        creds = urllib.urlencode(
+            {"c": self.company,
+             "u": self.user,
+             "p": self.password})
+
+        if param_str:
+            param_str = param_str + "&"
+
+        return "/" + kind + "/" + action + "?" + param_str + creds
+
+    def _check_status(self, f):
+        """Raise HTTPStatusError, after discarding the body,
+        for any portal response other than 200 or 206"""
+        if f.status not in (200, 206):
+            f.read()
+            raise Transport.HTTPStatusError(f.status,
+                                            f.reason,
+                                            f.getheader("Retry-After"))
+
+    def _parse_rpc(self, raw):
+        """Decode an RPC response body, failing
+        on authentication errors"""
+        resp = RPCResult(raw)
+
+        if resp.status == 403:
+            logging.debug("Authentication failed.")
+            self.fail(msg="Error: " + resp.errmsg, error=Errors.AuthError)
+        else:
+            return resp
+
+    def urlopen(self, path, headers=None):
+        """Issue a GET for the specified path on this account's portal
+        over a pooled keep-alive connection. Connect and read timeouts
+        are shortened to fit any deadline in effect."""
+        headers = dict(headers or {})
+        headers["X-LM-User-Agent"] = self.__version__
+
+        connect_timeout = self.connect_timeout
+        read_timeout = self.read_timeout
+        remaining = Deadline.remaining()
+
+        if remaining is not None:
+            # A timeout of 0 or less would make the socket non-blocking
+            if remaining <= 0:
+                raise Deadline.DeadlineExceeded(
+                    "Deadline exceeded before request was sent")
+
+            connect_timeout = min(connect_timeout or remaining, remaining)
+            read_timeout = min(read_timeout or remaining, remaining)
+
+        return self.pool.urlopen("GET", "/" + self.base_path + path,
+                                 headers=headers,
+                                 connect_timeout=connect_timeout,
+                                 read_timeout=read_timeout)
+
+    def get_collectors(self):
+        """Returns a JSON object containing a list of
+        LogicMonitor collectors"""
+        logging.debug("Running LogicMonitorSession.get_collectors...")
+
+        return self.collector_index().all()
+
+    def get_host_by_hostname(self, hostname, collector):
+        """Returns a host object for the host matching the
+        specified hostname"""
+        logging.debug("Running LogicMonitorSession.get_host_by_hostname...")
+
+        logging.debug("Looking for hostname " + hostname)
+
+        if collector:
+            logging.debug(
+                "Looking for host matching: hostname " + hostname +
+                " and collector " + str(collector["id"]))
+            host = self.host_index().get(hostname, collector["id"])
+
+            if host is not None:
+                logging.debug("Host match found")
+            else:
+                logging.debug("No host match found")
+
+            return host
+        else:
+            logging.debug("No collector specified")
+            return None
+
+    def get_host_by_displayname(self, displayname):
+        """Returns a host object for the host matching the
+        specified display name"""
+        logging.debug("Running LogicMonitorSession.get_host_by_displayname...")
+
+        logging.debug("Looking for displayname " + displayname)
+        host = self.host_index().get_by_displayname(displayname)
+
+        if host is not None:
+            logging.debug("Host match found")
+        else:
+            logging.debug("No host match found")
+
+        return host
+
+    def get_collector_by_description(self, description):
+        """Returns a JSON collector object for the collector
+        matching the specified FQDN (description)"""
+        logging.debug(
+            "Running LogicMonitorSession.get_collector_by_description...")
+
+        logging.debug("Looking for collector with description " +
+                      description)
+        collector = self.collector_index().get(description)
+
+        if collector is not None:
+            logging.debug("Collector match found")
+        else:
+            logging.debug("No collector match found")
+
+        return collector
+
+    def get_group(self, fullpath):
+        """Returns a JSON group object for the group matching the
+        specified path"""
+        logging.debug("Running LogicMonitorSession.get_group...")
+
+        logging.debug("Looking for group matching " + fullpath)
+        group = self.group_tree().get(fullpath)
+
+        if group is not None:
+            logging.debug("Group match found")
+        else:
+            logging.debug("No group match found")
+
+        return group
+
+    def fail(self, msg, error=None):
+        """Report an error which stops the operation. In library mode
+        (the raise_errors session parameter, or inside an
+        Errors.raise_errors() block) this raises error, a
+        LogicMonitorError subclass; otherwise it prints msg and exits."""
+        if self.raise_errors or Errors.raising():
+            logging.debug(msg)
+            raise (error or Errors.LogicMonitorError)(msg)
+
+        logging.warning(msg)
+        print(msg)
+        sys.exit(1)
+
+
+def _option_key(value):
+    """Returns a hashable stand-in for a session option value"""
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+
+    return value
+
+
+def _read_validator(partial):
+    """Returns the validator saved for a partial download, or None"""
+    try:
+        with open(partial + VALIDATOR_SUFFIX) as f:
+            return f.read().strip() or None
+    except IOError:
+        return None
+
+
+def _save_validator(partial, f):
+    """Save the strong ETag, or failing that the Last-Modified date, of
+    the response a partial download is written from. A download from a
+    response with neither can't be resumed."""
+    validator = f.getheader("ETag")
+    if not validator or validator.startswith("W/"):
+        validator = f.getheader("Last-Modified")
+
+    if not validator:
+        _remove(partial + VALIDATOR_SUFFIX)
+        return
+
+    with open(partial + VALIDATOR_SUFFIX, "w") as out:
+        out.write(validator)
+
+
+def _remove(path):
+    """Remove a file if it exists"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _content_md5(value):
+    """Returns the hex digest carried by a Content-MD5 header"""
+    if not value:
+        return None
+
+    try:
+        return binascii.hexlify(base64.b64decode(value))
+    except (TypeError, binascii.Error):
+        return None
@@ -0,0 +1,44 @@
+#!/usr/bin/python
+
+import logging
+
+# Use the fastest JSON decoder available. Any module with a
+# compatible loads() can be plugged in with set_json_backend().
+try:
+    import ujson as json_backend
+except ImportError:
+    try:
+        import simplejson as json_backend
+    except ImportError:
+        import json as json_backend
+
+
+def set_json_backend(module):
+    """Decode RPC responses with module.loads"""
+    global json_backend
+
+    logging.debug("Using " + module.__name__ + " to decode responses")
+    json_backend = module
+
+
+def loads(raw):
+    return json_backend.loads(raw)
+
+
+class RPCResult(object):
+    """A decoded LogicMonitor RPC response"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.body = loads(raw)
+        self.status = self.body.get("status")
+        self.data = self.body.get("data")
+        self.errmsg = self.body.get("errmsg")
+
+    @property
+    def ok(self):
+        return self.status == 200
+
+    def __repr__(self):
+        return ("<RPCResult status=" + str(self.status) +
+                " errmsg=" + repr(self.errmsg) + ">")
@@ -0,0 +1,171 @@
+#!/usr/bin/python
+
+import logging
+import threading
+import time
+import Actions
+import Retry
+
+# Default budgets, in calls per second, for reads and writes. These match
+# the portal's published per-user limits of 500 reads and 200 writes a
+# minute. Bursts of up to a few seconds' worth of calls are allowed.
+DEFAULT_READ_RATE = 500 / 60.0
+DEFAULT_WRITE_RATE = 200 / 60.0
+DEFAULT_BURST = 3
+
+LIMIT_HEADER = "X-Rate-Limit-Limit"
+REMAINING_HEADER = "X-Rate-Limit-Remaining"
+WINDOW_HEADER = "X-Rate-Limit-Window"
+
+
+class TokenBucket(object):
+
+    def __init__(self, rate, capacity=None):
+        """Initializor for a token bucket refilled at rate tokens a
+        second, holding at most capacity tokens. A rate of None
+        means calls are never delayed."""
+        self.rate = rate
+        self.capacity = capacity or max(1, (rate or 0) * DEFAULT_BURST)
+        self.tokens = self.capacity
+        self.updated = time.time()
+
+        self.acquired = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Take tokens from the bucket, sleeping until they are
+        available. Returns the number of seconds waited."""
+        with self._lock:
+            self.acquired = self.acquired + 1
+
+            if self.rate is None:
+                return 0
+
+            self._refill()
+            self.tokens = self.tokens - tokens
+
+            # A negative balance is a reservation against future refills,
+            # so concurrent callers queue up in arrival order
+            wait = 0
+            if self.tokens < 0:
+                wait = -self.tokens / self.rate
+                self.waits = self.waits + 1
+                self.total_wait = self.total_wait + wait
+
+        if wait:
+            logging.debug("Rate limited. Waiting %.2f seconds" % wait)
+            time.sleep(wait)
+
+        return wait
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+            self.capacity = max(1, (rate or 0) * DEFAULT_BURST)
+            self.tokens = min(self.tokens, self.capacity)
+
+    def pause(self, seconds):
+        """Hold back every caller for at least seconds"""
+        with self._lock:
+            if self.rate is None:
+                return
+
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+    def wait_time(self):
+        """Seconds the next caller would have to wait"""
+        with self._lock:
+            if self.rate is None:
+                return 0
+
+            self._refill()
+            return max(0, (1 - self.tokens) / self.rate)
+
+    def metrics(self):
+        with self._lock:
+            return {"rate": self.rate,
+                    "capacity": self.capacity,
+                    "acquired": self.acquired,
+                    "waits": self.waits,
+                    "total_wait": self.total_wait}
+
+    def _refill(self):
+        now = time.time()
+
+        if self.rate is not None:
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.updated) * self.rate)
+
+        self.updated = now
+
+
+class RateLimiter(object):
+    """Client-side throttle with separate token buckets for read and
+    write actions. Buckets adapt to any rate-limit headers the portal
+    returns and back off when the portal answers 429."""
+
+    def __init__(self,
+                 read_rate=DEFAULT_READ_RATE,
+                 write_rate=DEFAULT_WRITE_RATE):
+        logging.debug("Instantiating RateLimiter object")
+
+        self.buckets = {"read": TokenBucket(read_rate),
+                        "write": TokenBucket(write_rate)}
+
+    def bucket(self, action):
+        if Actions.is_read(action):
+            return self.buckets["read"]
+        return self.buckets["write"]
+
+    def acquire(self, action):
+        """Block until a call to action is allowed"""
+        return self.bucket(action).acquire()
+
+    def update(self, action, response):
+        """Adjust the bucket for action from the
+        headers and status of a portal response"""
+        bucket = self.bucket(action)
+
+        limit = _int_header(response, LIMIT_HEADER)
+        window = _int_header(response, WINDOW_HEADER)
+        remaining = _int_header(response, REMAINING_HEADER)
+
+        if limit and window:
+            rate = float(limit) / window
+
+            if rate != bucket.rate:
+                logging.debug("Portal rate limit for " + action +
+                              " is " + str(limit) + " per " +
+                              str(window) + " seconds")
+                bucket.set_rate(rate)
+
+        if response.status == 429:
+            retry_after = Retry.parse_retry_after(
+                response.getheader("Retry-After"))
+            bucket.pause(retry_after or window or 1)
+        elif remaining == 0 and window:
+            bucket.pause(window)
+
+    def metrics(self):
+        """Returns the current limits, waits and
+        wait times of each bucket"""
+        metrics = {}
+
+        for name, bucket in self.buckets.items():
+            metrics[name] = bucket.metrics()
+            metrics[name]["wait_time"] = bucket.wait_time()
+
+        return metrics
+
+
+def _int_header(response, name):
+    value = response.getheader(name)
+
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
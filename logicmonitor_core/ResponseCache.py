@@ -0,0 +1,118 @@
+#!/usr/bin/python
+
+import collections
+import json
+import logging
+import threading
+import time
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+
+class ResponseCache(object):
+    """Read-through memo of raw RPC responses keyed by (action, params).
+    Entries expire ttl seconds after they are stored, and the least
+    recently used are evicted once there are more than max_entries of
+    them or they hold more than max_bytes of response body."""
+
+    def __init__(self,
+                 actions,
+                 ttl=DEFAULT_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        logging.debug("Instantiating ResponseCache object")
+
+        self.actions = set(actions)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def enabled(self, action):
+        """Returns true if responses to action are memoized"""
+        return bool(self.ttl) and action in self.actions
+
+    def get(self, action, params):
+        """Returns the stored response body for the call, or None"""
+        if not self.enabled(action):
+            return None
+
+        key = call_key(action, params)
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+            if entry is not None and entry[0] > time.time():
+                # Re-inserting moves the entry to the most recent end
+                self._entries[key] = entry
+                self.hits = self.hits + 1
+                return entry[1]
+
+            if entry is not None:
+                self.bytes = self.bytes - len(entry[1])
+
+            self.misses = self.misses + 1
+            return None
+
+    def put(self, action, params, raw):
+        """Store the response body of a successful call"""
+        if not self.enabled(action) or len(raw) > self.max_bytes:
+            return
+
+        key = call_key(action, params)
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes = self.bytes - len(entry[1])
+
+            self._entries[key] = (time.time() + self.ttl, raw)
+            self.bytes = self.bytes + len(raw)
+
+            while (len(self._entries) > self.max_entries or
+                   self.bytes > self.max_bytes):
+                key, entry = self._entries.popitem(last=False)
+                self.bytes = self.bytes - len(entry[1])
+                self.evictions = self.evictions + 1
+
+    def invalidate(self, actions=None):
+        """Drop every entry for the specified actions,
+        or every entry when actions is None"""
+        with self._lock:
+            for key in self._entries.keys():
+                if actions is None or key[0] in actions:
+                    entry = self._entries.pop(key)
+                    self.bytes = self.bytes - len(entry[1])
+                    self.invalidations = self.invalidations + 1
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+
+            if lookups:
+                hit_rate = float(self.hits) / lookups
+            else:
+                hit_rate = None
+
+            return {"size": len(self._entries),
+                    "bytes": self.bytes,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "hit_rate": hit_rate,
+                    "evictions": self.evictions,
+                    "invalidations": self.invalidations}
+
+
+def call_key(action, params):
+    """Returns a hashable key identifying an RPC call"""
+    return (action, json.dumps(params, sort_keys=True))
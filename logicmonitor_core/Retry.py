@@ -0,0 +1,169 @@
+#!/usr/bin/python
+
+import email.utils
+import logging
+import random
+import threading
+import time
+import Actions
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# The server refused these before doing any work, so
+# even non-idempotent calls are safe to send again
+REJECTED_STATUSES = (429, 503)
+
+
+class RetryPolicy(object):
+
+    def __init__(self,
+                 max_retries=3,
+                 backoff_factor=0.5,
+                 max_backoff=30,
+                 statuses=RETRY_STATUSES,
+                 retry_connection_errors=True):
+        """Initializor for a retry policy. Retries wait for a random
+        (full jitter) interval of up to backoff_factor * 2^attempt
+        seconds, capped at max_backoff, or for as long as the
+        server's Retry-After header asks if that is longer."""
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self.retry_connection_errors = retry_connection_errors
+
+    def get_delay(self, attempt, error):
+        """Returns the number of seconds to wait before retrying
+        after error, or None if the call shouldn't be retried"""
+        if attempt >= self.max_retries:
+            return None
+
+        status = getattr(error, "status", None)
+
+        if status is None:
+            if not self.retry_connection_errors:
+                return None
+        elif status not in self.statuses:
+            return None
+
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+
+        retry_after = parse_retry_after(getattr(error, "retry_after", None))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        return delay
+
+
+READ_POLICY = RetryPolicy(max_retries=5)
+IDEMPOTENT_WRITE_POLICY = RetryPolicy(max_retries=3)
+WRITE_POLICY = RetryPolicy(max_retries=3,
+                           statuses=REJECTED_STATUSES,
+                           retry_connection_errors=False)
+
+
+def default_policy(action):
+    """Returns the retry policy for an RPC action. Reads are retried
+    freely, idempotent writes on any transient error, and other
+    writes only when the server refused the call outright."""
+    if Actions.is_read(action):
+        return READ_POLICY
+    elif Actions.is_idempotent(action):
+        return IDEMPOTENT_WRITE_POLICY
+    else:
+        return WRITE_POLICY
+
+
+def parse_retry_after(value):
+    """Returns the number of seconds requested by a Retry-After
+    header, which is either a delay or an HTTP date"""
+    if value is None:
+        return None
+
+    try:
+        return max(0, int(value))
+    except ValueError:
+        pass
+
+    parsed = email.utils.parsedate_tz(value)
+
+    if parsed is None:
+        return None
+
+    return max(0, email.utils.mktime_tz(parsed) - time.time())
+
+
+class CircuitBreaker(object):
+    """Stops calls to an unhealthy portal. After failure_threshold
+    consecutive failed calls (each counted once, however often it was
+    retried) the circuit opens and calls fail fast. Once
+    reset_timeout seconds have passed a single trial call is let through;
+    if it succeeds the circuit closes again. A trial whose outcome is
+    never recorded is replaced by another after reset_timeout."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trial_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Returns true if a call may be made now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            now = time.time()
+
+            if (self.state == self.OPEN and
+               now - self.opened_at >= self.reset_timeout):
+                logging.debug("Circuit half-open. Allowing trial call.")
+                self.state = self.HALF_OPEN
+                self.trial_at = now
+                return True
+
+            trial_over = (self.trial_at is None or
+                          now - self.trial_at >= self.reset_timeout)
+
+            if self.state == self.HALF_OPEN and trial_over:
+                logging.debug("No trial call outcome. Allowing another.")
+                self.trial_at = now
+                return True
+
+            return False
+
+    def release(self):
+        """Give up the half-open trial without an outcome, so
+        the next call may make another"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.trial_at = None
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logging.debug("Circuit closed")
+
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures = self.failures + 1
+
+            if (self.state == self.HALF_OPEN or
+               self.failures >= self.failure_threshold):
+                if self.state != self.OPEN:
+                    logging.debug("Circuit opened after " +
+                                  str(self.failures) + " failures")
+
+                self.state = self.OPEN
+                self.opened_at = time.time()
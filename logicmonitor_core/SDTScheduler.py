@@ -0,0 +1,152 @@
+#!/usr/bin/python
+
+import logging
+from datetime import datetime, timedelta
+import Deadline
+import Errors
+from BatchExecutor import BatchExecutor, BatchResult, batch
+
+# RPC action, id parameter and whether notifyCC is set, for each kind
+# of target. Each action is the one used by the matching sdt() method.
+SDT_ACTIONS = {"host": ("setHostSDT", "hostId", False),
+               "group": ("setHostGroupSDT", "hostGroupId", False),
+               "collector": ("setAgentSDT", "agentId", True),
+               "datasource": ("setHostDataSourceSDT", "hostDataSourceId",
+                              True)}
+
+
+class SDTScheduler(BatchExecutor):
+    """Puts many hosts, groups, collectors and datasources into scheduled
+    down time (a maintenance window) at once, at most max_concurrency
+    calls at a time"""
+
+    @Deadline.bounded
+    @batch
+    def schedule(self, targets, duration=30, starttime=None):
+        """Schedule the same down time for every target.
+
+        targets is a list of (kind, key) pairs. kind is "host" (key is
+        the display name or id), "group" (the full path or id),
+        "collector" (the description or id) or "datasource" (the host
+        datasource id). starttime is a 'YYYY-MM-DD HH:MM' string in the
+        account's time zone and defaults to now. duration is in minutes.
+
+        Targets are resolved from the session's indexes, and the time
+        zone offset is fetched once for the whole batch. Returns a
+        BatchResult per target, in the same order. A deadline (in
+        seconds) applies to the batch as a whole."""
+        logging.debug("Running SDTScheduler.schedule...")
+
+        targets = list(targets)
+
+        try:
+            window = self._window(duration, starttime)
+            self._load_indexes(targets)
+        except (ValueError, Errors.LogicMonitorError) as e:
+            logging.debug(str(e))
+            return [BatchResult(target, error=e) for target in targets]
+
+        futures = []
+        for target in targets:
+            try:
+                futures.append(self.call(*self._sdt_call(target, window)))
+            except (ValueError, Errors.LogicMonitorError) as e:
+                futures.append(BatchResult(target, error=e))
+
+        results = []
+        for target, future in zip(targets, futures):
+            if isinstance(future, BatchResult):
+                results.append(future)
+            else:
+                results.append(self._rpc_result(target, future))
+
+        logging.debug("Scheduled down time for " + str(len(targets)) +
+                      " targets")
+        return results
+
+    def _window(self, duration, starttime):
+        """Returns the start and end fields shared by every set*SDT call"""
+        if starttime:
+            logging.debug("Start time specified")
+            offsetstart = datetime.strptime(starttime, '%Y-%m-%d %H:%M')
+        else:
+            logging.debug("No start time specified. Using default.")
+            start = datetime.utcnow()
+
+            # Use user UTC offset
+            logging.debug("Making RPC call to 'getTimeZoneSetting'")
+            accountresp = self.session.call("getTimeZoneSetting", {})
+
+            if accountresp.status != 200:
+                raise Errors.for_result(accountresp)(
+                    "Error: Unable to retrieve timezone offset")
+
+            offsetstart = start + timedelta(0, accountresp.data["offset"])
+
+        offsetend = offsetstart + timedelta(0, int(duration)*60)
+
+        return {"type": 1,
+                "year": offsetstart.year,
+                "month": offsetstart.month - 1,
+                "day": offsetstart.day,
+                "hour": offsetstart.hour,
+                "minute": offsetstart.minute,
+                "endYear": offsetend.year,
+                "endMonth": offsetend.month - 1,
+                "endDay": offsetend.day,
+                "endHour": offsetend.hour,
+                "endMinute": offsetend.minute}
+
+    def _load_indexes(self, targets):
+        """Load the indexes needed to resolve targets up front, so a
+        portal failure fails the batch once rather than every target"""
+        kinds = set(target[0] for target in targets)
+
+        if "host" in kinds:
+            self.session.host_index()
+        if "group" in kinds:
+            self.session.group_tree()
+        if "collector" in kinds:
+            self.session.collector_index()
+
+    def _sdt_call(self, target, window):
+        """Returns the (action, params) of the set*SDT call for a target"""
+        kind, key = target
+
+        if kind not in SDT_ACTIONS:
+            raise ValueError("Error: Unknown SDT target kind " + str(kind))
+        action, idparam, notify = SDT_ACTIONS[kind]
+
+        h = dict(window)
+        h[idparam] = self._resolve(kind, key)
+        if notify:
+            h["notifyCC"] = True
+
+        return action, h
+
+    def _resolve(self, kind, key):
+        """Returns the id of a target"""
+        if kind == "datasource":
+            return key
+
+        if kind == "host":
+            hosts = self.session.host_index()
+            record = (hosts.get_by_displayname(key) or
+                      hosts.get_by_id(key))
+        elif kind == "group":
+            groups = self.session.group_tree()
+            record = None
+            if isinstance(key, basestring):
+                record = groups.get(key)
+            if record is None:
+                record = groups.get_by_id(key)
+        else:
+            collectors = self.session.collector_index()
+            record = (collectors.get(key) or
+                      collectors.get_by_id(key))
+
+        if record is None:
+            raise Errors.NotFoundError("Error: " + kind + " " + str(key) +
+                                       " doesn't exist")
+
+        return record["id"]
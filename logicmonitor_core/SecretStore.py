@@ -0,0 +1,159 @@
+#!/usr/bin/python
+
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+
+SECTION = "secrets"
+DEFAULT_TTL = 24 * 60 * 60
+
+
+def object_version(record):
+    """Returns the version of a host or group record,
+    which changes whenever the object is modified"""
+    if not isinstance(record, dict):
+        return None
+
+    return record.get("updatedOn")
+
+
+class SecretStore(object):
+    """Salted hashes of the property values last written to each host and
+    group. While an object's version is unchanged, a desired value whose
+    hash matches the recorded one is known to be set on the server, so
+    the server doesn't have to be asked to verify it. The hashes are
+    kept in the inventory cache directory.
+
+    The file is read once per store. Changes are buffered in memory and
+    written out together by flush(), which bulk calls run when they
+    finish and which also runs when the interpreter exits."""
+
+    def __init__(self, cache, ttl=DEFAULT_TTL):
+        logging.debug("Instantiating SecretStore object")
+
+        self.cache = cache
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._loaded = None
+        self._pending = {}
+
+        atexit.register(self.flush)
+
+    def unmatched(self, kind, object_id, version, properties):
+        """Returns the names of the properties (a dictionary of name to
+        desired value) which can't be confirmed from the recorded hashes
+        for the object at the specified version. Without a known version
+        none of them can."""
+        with self._lock:
+            entry = self._entries().get(_object_key(kind, object_id))
+
+        if (version is None or
+           entry is None or
+           entry.get("version") != version or
+           time.time() - entry.get("saved_at", 0) > self.ttl):
+            names = properties.keys()
+        else:
+            hashes = entry["properties"]
+            names = [name for name, value in properties.iteritems()
+                     if name not in hashes or
+                     _digest(hashes[name][0], name, value) != hashes[name][1]]
+
+        with self._lock:
+            self.hits = self.hits + len(properties) - len(names)
+            self.misses = self.misses + len(names)
+
+        return names
+
+    def record(self, kind, object_id, version, properties, replace=True):
+        """Record the property values (a dictionary of name to value) set
+        on an object at the specified version. Unless replace is false,
+        values previously recorded for the object are discarded."""
+        key = _object_key(kind, object_id)
+
+        with self._lock:
+            entries = self._entries()
+            entry = entries.get(key)
+
+            if replace or entry is None or entry.get("version") != version:
+                entry = {"properties": {}}
+
+            for name, value in properties.iteritems():
+                salt = os.urandom(16).encode("hex")
+                entry["properties"][name] = [salt, _digest(salt, name, value)]
+
+            entry["version"] = version
+            entry["saved_at"] = time.time()
+            entries[key] = entry
+            self._pending[key] = entry
+
+    def forget(self, kind, object_id):
+        """Discard the values recorded for a deleted object"""
+        key = _object_key(kind, object_id)
+
+        with self._lock:
+            if self._entries().pop(key, None) is not None:
+                self._pending[key] = None
+
+    def flush(self):
+        """Write the changes made since the last flush to the cache,
+        merged with whatever other processes have written meanwhile"""
+        with self._lock:
+            if not self._pending:
+                return
+
+            logging.debug("Saving " + str(len(self._pending)) +
+                          " secret store changes")
+
+            entries = self._load()
+            for key, entry in self._pending.iteritems():
+                if entry is None:
+                    entries.pop(key, None)
+                else:
+                    entries[key] = entry
+
+            self.cache.save(SECTION, entries)
+            self._loaded = entries
+            self._pending = {}
+
+    def metrics(self):
+        with self._lock:
+            return {"hits": self.hits,
+                    "misses": self.misses}
+
+    def _entries(self):
+        """Returns the recorded entries, including unsaved changes.
+        Must be called holding the lock."""
+        if self._loaded is None:
+            self._loaded = self._load()
+        return self._loaded
+
+    def _load(self):
+        loaded = self.cache.load(SECTION, self.ttl)
+
+        if loaded is None or not isinstance(loaded[0], dict):
+            return {}
+        return loaded[0]
+
+
+def _object_key(kind, object_id):
+    return kind + ":" + str(object_id)
+
+
+def _digest(salt, name, value):
+    digest = hashlib.sha256(salt)
+    digest.update(_encode(name))
+    digest.update("\0")
+    digest.update(_encode(value))
+
+    return digest.hexdigest()
+
+
+def _encode(value):
+    if isinstance(value, unicode):
+        return value.encode("utf-8")
+    return str(value)
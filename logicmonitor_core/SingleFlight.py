@@ -0,0 +1,81 @@
+#!/usr/bin/python
+
+import logging
+import sys
+import threading
+import Deadline
+
+
+class _Flight(object):
+    """A call in progress and, once it completes, its outcome"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+
+class SingleFlight(object):
+    """Coalesces identical concurrent calls. While a call for a key is in
+    flight, other callers for the same key wait for its outcome rather
+    than making the call again."""
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Return fn(), or the result of the call to fn
+        already in flight for key"""
+        with self._lock:
+            flight = self._flights.get(key)
+
+            if flight is None:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.leaders = self.leaders + 1
+                leader = True
+            else:
+                self.coalesced = self.coalesced + 1
+                leader = False
+
+        if leader:
+            return self._lead(key, flight, fn)
+
+        logging.debug("Waiting for identical call in flight")
+        return self._follow(flight)
+
+    def metrics(self):
+        with self._lock:
+            return {"in_flight": len(self._flights),
+                    "calls": self.leaders,
+                    "coalesced": self.coalesced}
+
+    def _lead(self, key, flight, fn):
+        try:
+            flight.result = fn()
+        except BaseException:
+            flight.exc_info = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+
+        return flight.result
+
+    def _follow(self, flight):
+        # The caller's own deadline still applies while it waits
+        flight.event.wait(Deadline.remaining())
+
+        if not flight.event.is_set():
+            raise Deadline.DeadlineExceeded(
+                "Deadline exceeded waiting for call in flight")
+
+        if flight.exc_info is not None:
+            raise flight.exc_info[0], flight.exc_info[1], flight.exc_info[2]
+
+        return flight.result
@@ -0,0 +1,325 @@
+#!/usr/bin/python
+
+import errno
+import httplib
+import logging
+import select
+import socket
+import threading
+import time
+import zlib
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_IDLE_TIMEOUT = 60
+READ_CHUNK_SIZE = 64 * 1024
+
+# Socket errors from a keep-alive connection the server had already
+# closed, which means the request never reached it
+STALE_ERRNOS = (errno.ECONNRESET, errno.EPIPE, errno.ECONNABORTED)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(host, port=None, **params):
+    """Returns the keep-alive connection pool shared by every client
+    talking to the specified host. The pool grows to the largest maxsize
+    any of them asks for."""
+    key = (host, port)
+
+    with _pools_lock:
+        pool = _pools.get(key)
+
+        if pool is None:
+            logging.debug("Creating connection pool for " + host)
+            pool = ConnectionPool(host, port, **params)
+            _pools[key] = pool
+        elif params.get("maxsize", DEFAULT_POOL_SIZE) > pool.maxsize:
+            logging.debug("Growing connection pool for " + host)
+            pool.maxsize = params.get("maxsize", DEFAULT_POOL_SIZE)
+
+    return pool
+
+
+class HTTPStatusError(IOError):
+    """Raised for a portal response with an HTTP status other than 200"""
+
+    def __init__(self, status, reason, retry_after=None):
+        IOError.__init__(self, "HTTP " + str(status) + " " + reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class DeflateDecoder(object):
+    """Incremental decoder for \"deflate\" bodies. The spec says zlib
+    format, but some servers send a raw deflate stream instead."""
+
+    def __init__(self):
+        self._first = True
+        self._data = ""
+        self._obj = zlib.decompressobj()
+
+    def decompress(self, data):
+        if not self._first:
+            return self._obj.decompress(data)
+
+        self._data = self._data + data
+
+        try:
+            decoded = self._obj.decompress(data)
+        except zlib.error:
+            self._first = False
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._obj.decompress(self._data)
+
+        if decoded:
+            self._first = False
+            self._data = ""
+
+        return decoded
+
+    def flush(self):
+        return self._obj.flush()
+
+
+class PooledResponse(object):
+    """File-like wrapper around an HTTP response which hands its
+    connection back to the pool once the body has been read. gzip and
+    deflate encoded bodies are decompressed as they arrive."""
+
+    def __init__(self, pool, conn, resp):
+        self.pool = pool
+        self.conn = conn
+        self.resp = resp
+        self.status = resp.status
+        self.reason = resp.reason
+
+        self._buffer = ""
+        self._decoder = None
+        self.bytes_received = 0
+
+        encoding = (resp.getheader("Content-Encoding") or "").lower()
+        if encoding == "gzip":
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            self._decoder = DeflateDecoder()
+
+    def getheader(self, name, default=None):
+        return self.resp.getheader(name, default)
+
+    def read(self, amt=None):
+        """Read amt bytes (or the rest) of the decoded response body"""
+        if self._decoder is None:
+            return self._read_raw(amt)
+
+        try:
+            if amt is None:
+                parts = [self._buffer]
+                self._buffer = ""
+
+                while True:
+                    chunk = self._read_raw(READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    parts.append(self._decoder.decompress(chunk))
+
+                parts.append(self._decoder.flush())
+                return "".join(parts)
+
+            while len(self._buffer) < amt:
+                chunk = self._read_raw(amt)
+                if not chunk:
+                    self._buffer = self._buffer + self._decoder.flush()
+                    break
+                self._buffer = self._buffer + self._decoder.decompress(chunk)
+        except zlib.error as e:
+            self.release()
+            raise IOError("Unable to decompress response from " +
+                          self.pool.host + ": " + str(e))
+
+        data = self._buffer[:amt]
+        self._buffer = self._buffer[amt:]
+        return data
+
+    def release(self):
+        """Return the connection to the pool if the whole body was
+        consumed, otherwise discard it"""
+        if self.conn is None:
+            return
+
+        if self.resp.isclosed() and not self.resp.will_close:
+            self.pool._put_conn(self.conn)
+        else:
+            self.conn.close()
+
+        self.conn = None
+
+    def close(self):
+        self.release()
+
+    def _read_raw(self, amt):
+        try:
+            if amt is None:
+                data = self.resp.read()
+            else:
+                data = self.resp.read(amt)
+        except httplib.HTTPException as e:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+            raise IOError("Error reading response from " +
+                          self.pool.host + ": " + repr(e))
+
+        self.bytes_received = self.bytes_received + len(data)
+
+        if amt is None or not data:
+            self.release()
+
+        return data
+
+
+class ConnectionPool(object):
+
+    def __init__(self,
+                 host,
+                 port=None,
+                 maxsize=DEFAULT_POOL_SIZE,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        """Initializor for a pool of persistent HTTPS
+        connections to a single host"""
+        logging.debug("Instantiating ConnectionPool object")
+
+        self.host = host
+        self.port = port
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def urlopen(self,
+                method,
+                url,
+                body=None,
+                headers=None,
+                connect_timeout=None,
+                read_timeout=None):
+        """Send a request over a pooled connection and return
+        a PooledResponse. A reused connection which turns out to have
+        been dropped by the server before it got the request is retried
+        once on a new one. Anything else, timeouts included, is left to
+        the caller's retry policy, as the request may have been acted on.
+        Compressed responses are requested unless the caller sets its
+        own Accept-Encoding. Timeouts are in seconds; None waits forever."""
+        logging.debug("Running ConnectionPool.urlopen...")
+
+        headers = dict(headers or {})
+        headers.setdefault("Accept-Encoding", "gzip, deflate")
+        timeouts = (connect_timeout, read_timeout)
+        conn, reused = self._get_conn()
+
+        try:
+            resp = self._send(conn, method, url, body, headers, timeouts)
+        except (httplib.HTTPException, socket.error) as e:
+            conn.close()
+
+            if not reused or not _never_received(e):
+                raise IOError("Error talking to " + self.host + ": " + str(e))
+
+            logging.debug("Pooled connection went stale. Reconnecting.")
+            conn = self._new_conn()
+
+            try:
+                resp = self._send(conn, method, url, body, headers, timeouts)
+            except (httplib.HTTPException, socket.error) as e:
+                conn.close()
+                raise IOError("Error talking to " + self.host + ": " + str(e))
+
+        return PooledResponse(self, conn, resp)
+
+    def close(self):
+        """Close every idle connection held by the pool"""
+        logging.debug("Running ConnectionPool.close...")
+
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+
+        for conn, last_used in idle:
+            conn.close()
+
+    def _send(self, conn, method, url, body, headers, timeouts):
+        connect_timeout, read_timeout = timeouts
+
+        if conn.sock is None:
+            conn.timeout = connect_timeout
+            conn.connect()
+
+        conn.sock.settimeout(read_timeout)
+        conn.request(method, url, body, headers)
+        return conn.getresponse()
+
+    def _new_conn(self):
+        logging.debug("Opening new connection to " + self.host)
+        return httplib.HTTPSConnection(self.host, self.port)
+
+    def _get_conn(self):
+        """Return a (connection, reused) tuple, preferring the most
+        recently used idle connection which is still healthy"""
+        now = time.time()
+
+        with self._lock:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+
+                if now - last_used > self.idle_timeout:
+                    logging.debug("Recycling idle connection")
+                    conn.close()
+                elif self._is_dropped(conn):
+                    logging.debug("Discarding dropped connection")
+                    conn.close()
+                else:
+                    return conn, True
+
+        return self._new_conn(), False
+
+    def _put_conn(self, conn):
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append((conn, time.time()))
+                return
+
+        logging.debug("Connection pool full. Closing connection.")
+        conn.close()
+
+    def _is_dropped(self, conn):
+        """An idle keep-alive socket should never be readable. If it is,
+        the server has closed it (or sent garbage) and it can't be reused."""
+        sock = conn.sock
+
+        if sock is None:
+            return True
+
+        try:
+            readable, writable, errored = select.select([sock], [], [], 0)
+        except (select.error, socket.error, ValueError):
+            return True
+
+        return bool(readable)
+
+
+def _never_received(error):
+    """Returns true if error shows a reused connection had been closed
+    by the server before the request was sent, rather than the server
+    failing (or taking too long) to answer it"""
+    if isinstance(error, socket.timeout):
+        return False
+
+    if isinstance(error, httplib.BadStatusLine):
+        # Closed without a single byte of response
+        return error.line in ("", repr(""))
+
+    if isinstance(error, socket.error):
+        return getattr(error, "errno", None) in STALE_ERRNOS
+
+    return False